@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Migration Script for FBR Integrated POS System
+This script applies the SQL files in migrations/ that have not been applied yet.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def get_pending_migrations(conn):
+    """Return migration file names that are not recorded in schema_migrations"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name        VARCHAR(200) PRIMARY KEY,
+            applied_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+        )
+    """))
+    applied = {row.name for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
+    return [f for f in files if f not in applied]
+
+def apply_migrations():
+    """Apply each pending migration in its own transaction"""
+    with engine.begin() as conn:
+        pending = get_pending_migrations(conn)
+    
+    if not pending:
+        print("✅ Database schema is up to date")
+        return True
+    
+    for name in pending:
+        with open(os.path.join(MIGRATIONS_DIR, name), 'r') as f:
+            sql = f.read()
+        
+        try:
+            with engine.begin() as conn:
+                # Straight to the driver: '%' in plpgsql format() strings is not a parameter
+                conn.connection.cursor().execute(sql)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (name) VALUES (:name)"),
+                    {"name": name}
+                )
+            print(f"✅ Applied: {name}")
+        except Exception as e:
+            print(f"❌ Failed to apply {name}: {e}")
+            return False
+    
+    return True
+
+if __name__ == "__main__":
+    if not apply_migrations():
+        sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Sales Archive for FBR Integrated POS System
+This script moves closed months of sales, sale items and payments (every sale
+synced to FBR, older than the keep window) from the hot tables into
+zstd-compressed Parquet files under SALES_ARCHIVE_DIR. GET /api/sales/{id}
+still returns archived sales; listings, stats and exports cover hot months only.
+
+Usage: python archive_sales.py [--month YYYY-MM] [--keep-months 3] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+from sales_archive import SALES_ARCHIVE_KEEP_MONTHS, archive_month, closed_months
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed months of sales to Parquet files")
+    parser.add_argument("--month", type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+                        help="archive only this month (default: every closed month)")
+    parser.add_argument("--keep-months", type=int, default=SALES_ARCHIVE_KEEP_MONTHS,
+                        help="recent months to keep in the database")
+    parser.add_argument("--dry-run", action="store_true", help="list the months without archiving them")
+    args = parser.parse_args()
+
+    try:
+        if args.month:
+            months = [args.month]
+        else:
+            with engine.connect() as conn:
+                months = closed_months(conn, args.keep_months)
+        if not months:
+            print("No closed months to archive")
+            return
+        if args.dry_run:
+            print(f"Would archive {', '.join(f'{month:%Y-%m}' for month in months)}")
+            return
+        for month in months:
+            archived = archive_month(month)
+            if archived:
+                print(f"✅ Archived {month:%Y-%m}: {archived.sale_count} sales, {archived.item_count} items, "
+                      f"{archived.payment_count} payments to {archived.path}")
+            else:
+                print(f"No sales in {month:%Y-%m}")
+    except Exception as e:
+        print(f"❌ Error archiving sales: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Checkout Benchmark for FBR Integrated POS System
+This script measures latency and database round trips of POST /api/sales,
+comparing the original per-item checkout path with the single-transaction one.
+
+Usage: python benchmark_checkout.py [--items 40] [--runs 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException, Response
+from sqlalchemy import event
+
+from database import engine, SessionLocal, async_engine, AsyncSessionLocal
+from models import (
+    Base, Branch, Device, Category, TaxRate, Product,
+    Sale as SaleModel, SaleItem as SaleItemModel, Payment as PaymentModel, SalesDailyRollup
+)
+from routers.sales import create_sale
+from schemas import SaleCreate
+
+class RoundTripCounter:
+    """Count statements sent to the database (an executemany counts once)"""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def legacy_create_sale(sale: SaleCreate, db):
+    """The checkout path as it was before the single-transaction rewrite"""
+    if not db.query(Branch).filter(Branch.id == sale.branch_id).first():
+        raise HTTPException(status_code=400, detail="Branch not found")
+    if not db.query(Device).filter(Device.id == sale.device_id).first():
+        raise HTTPException(status_code=400, detail="Device not found")
+    if db.query(SaleModel).filter(SaleModel.invoice_no == sale.invoice_no).first():
+        raise HTTPException(status_code=400, detail="Invoice number already exists")
+    if db.query(SaleModel).filter(SaleModel.usin == sale.usin).first():
+        raise HTTPException(status_code=400, detail="USIN already exists")
+
+    db_sale = SaleModel(**sale.dict(exclude={"items", "payments"}))
+    db.add(db_sale)
+    db.commit()
+    db.refresh(db_sale)
+
+    for item in sale.items:
+        if not db.query(Product).filter(Product.id == item.product_id).first():
+            raise HTTPException(status_code=400, detail=f"Product {item.product_id} not found")
+        db.add(SaleItemModel(sale_id=db_sale.id, sale_date=db_sale.invoice_date, **item.dict()))
+
+    for payment in sale.payments:
+        db.add(PaymentModel(sale_id=db_sale.id, sale_date=db_sale.invoice_date, **payment.dict()))
+
+    db.commit()
+    db.refresh(db_sale)
+    return db_sale
+
+# create_sale is async; every run shares one loop so pooled connections stay usable
+_loop = asyncio.new_event_loop()
+
+def async_create_sale(sale: SaleCreate, db):
+    """Run the async checkout endpoint on its own AsyncSession"""
+    async def checkout():
+        async with AsyncSessionLocal() as async_db:
+            return await create_sale(sale, Response(), async_db)
+    return _loop.run_until_complete(checkout())
+
+def seed_catalog(db, item_count):
+    """Create a branch, device and products used by the benchmark"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(
+        name=f"Bench Branch {tag}",
+        ntn="1234567",
+        strn="1234567",
+        fbr_branch_code=f"BENCH-{tag}",
+        sale_type_code="T1000017"
+    )
+    db.add(branch)
+    db.flush()
+
+    device = Device(
+        branch_id=branch.id,
+        name=f"Bench Till {tag}",
+        device_identifier=f"BENCH-DEV-{tag}",
+        fbr_pos_reg=f"BP-{tag}"
+    )
+    tax_rate = TaxRate(name=f"Bench Rate {tag}", rate=Decimal("17.00"), code="SRO-1")
+    category = Category(name=f"Bench Category {tag}")
+    db.add_all([device, tax_rate, category])
+    db.flush()
+
+    products = [
+        Product(
+            code=f"BENCH-{tag}-{i}",
+            name=f"Bench Product {i}",
+            category_id=category.id,
+            price=Decimal("100.00"),
+            tax_id=tax_rate.id
+        )
+        for i in range(item_count)
+    ]
+    db.add_all(products)
+    db.commit()
+    return tag, branch, device, products
+
+def build_sale(tag, run, branch, device, products):
+    """Build a checkout request with one line per product"""
+    items = [
+        {
+            "product_id": product.id,
+            "quantity": Decimal("1"),
+            "unit_price": Decimal("100.00"),
+            "value_excl_tax": Decimal("100.00"),
+            "sales_tax": Decimal("17.00"),
+            "line_total": Decimal("117.00")
+        }
+        for product in products
+    ]
+    total_value = Decimal("100.00") * len(items)
+    total_tax = Decimal("17.00") * len(items)
+    return SaleCreate(
+        invoice_no=f"B{tag}{run}",
+        branch_id=branch.id,
+        device_id=device.id,
+        invoice_type="SALE",
+        sale_type_code="T1000017",
+        seller_ntn="1234567",
+        seller_strn="1234567",
+        total_qty=Decimal(len(items)),
+        total_sales_value=total_value,
+        total_tax=total_tax,
+        total_amount=total_value + total_tax,
+        usin=f"BENCH-{tag}-{run}",
+        items=items,
+        payments=[{"method": "Cash", "amount": total_value + total_tax}]
+    )
+
+def run_benchmark(label, checkout, tag, branch, device, products, runs):
+    """Run a checkout implementation and report its latency and round trips"""
+    counter = RoundTripCounter()
+    latencies = []
+    round_trips = []
+
+    for run in range(runs):
+        sale = build_sale(f"{tag}{label[0]}", run, branch, device, products)
+        db = SessionLocal()
+        event.listen(engine, "before_cursor_execute", counter)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+        try:
+            counter.count = 0
+            start = time.perf_counter()
+            checkout(sale, db)
+            latencies.append((time.perf_counter() - start) * 1000)
+            round_trips.append(counter.count)
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+            event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+            db.close()
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{label:<10} p50={statistics.median(latencies):7.2f} ms  "
+        f"p95={p95:7.2f} ms  round trips={statistics.mean(round_trips):.0f}"
+    )
+
+def cleanup(db, tag, branch, device, products):
+    """Remove everything the benchmark created"""
+    sale_ids = [
+        row.id for row in db.query(SaleModel.id).filter(SaleModel.usin.like(f"BENCH-{tag}%"))
+    ]
+    if sale_ids:
+        db.query(SaleItemModel).filter(SaleItemModel.sale_id.in_(sale_ids)).delete(synchronize_session=False)
+        db.query(PaymentModel).filter(PaymentModel.sale_id.in_(sale_ids)).delete(synchronize_session=False)
+        db.query(SaleModel).filter(SaleModel.id.in_(sale_ids)).delete(synchronize_session=False)
+    category_id = products[0].category_id if products else None
+    tax_id = products[0].tax_id if products else None
+    db.query(Product).filter(Product.code.like(f"BENCH-{tag}-%")).delete(synchronize_session=False)
+    db.query(Category).filter(Category.id == category_id).delete(synchronize_session=False)
+    db.query(TaxRate).filter(TaxRate.id == tax_id).delete(synchronize_session=False)
+    db.query(SalesDailyRollup).filter(SalesDailyRollup.device_id == device.id).delete(synchronize_session=False)
+    db.query(Device).filter(Device.id == device.id).delete(synchronize_session=False)
+    db.query(Branch).filter(Branch.id == branch.id).delete(synchronize_session=False)
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the POST /api/sales checkout path")
+    parser.add_argument("--items", type=int, default=40, help="line items per basket")
+    parser.add_argument("--runs", type=int, default=50, help="checkouts per implementation")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        tag, branch, device, products = seed_catalog(db, args.items)
+        print(f"Checkout benchmark: {args.items} line items, {args.runs} runs each")
+        run_benchmark("before", legacy_create_sale, tag, branch, device, products, args.runs)
+        run_benchmark("after", async_create_sale, tag, branch, device, products, args.runs)
+        cleanup(db, tag, branch, device, products)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
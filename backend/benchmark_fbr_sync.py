@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+FBR Sync Benchmark for FBR Integrated POS System
+This script seeds N sales, queues them through sync_sale_to_fbr while
+fbr_worker.py processes drain the queue against an FBR endpoint (by default a
+local fbr_stub.py) and reports invoices/sec, end-to-end sync latency and the
+database load of the sync path.
+
+Usage: python benchmark_fbr_sync.py [--sales 5000] [--workers 2] [--start-stub]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from database import engine, SessionLocal
+from models import (
+    Base, Branch, Device, Product,
+    Sale as SaleModel, SaleItem as SaleItemModel, InvoiceSyncLog as InvoiceSyncLogModel,
+    FBRStatusEnum
+)
+from routers.sales import sync_sale_to_fbr
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_LOAD_COUNTERS = [
+    "xact_commit", "xact_rollback", "tup_returned", "tup_fetched",
+    "tup_inserted", "tup_updated", "blks_read", "blks_hit"
+]
+
+def start_stub(args):
+    """Start fbr_stub.py and wait until it accepts connections"""
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(BACKEND_DIR, "fbr_stub.py"),
+        "--port", str(args.stub_port),
+        "--latency-ms", str(args.latency_ms),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit", str(args.rate_limit)
+    ])
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", args.stub_port), timeout=0.5).close()
+            return stub
+        except OSError:
+            time.sleep(0.2)
+    stub.terminate()
+    raise RuntimeError("FBR stub did not start")
+
+def seed_sales(db, sale_count):
+    """Insert sale_count one-line sales that the worker will not pick up until queued"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(
+        name=f"Bench Branch {tag}",
+        ntn="1234567",
+        strn="1234567",
+        fbr_branch_code=f"BENCH-{tag}",
+        sale_type_code="T1000017"
+    )
+    db.add(branch)
+    db.flush()
+    device = Device(
+        branch_id=branch.id,
+        name=f"Bench Till {tag}",
+        device_identifier=f"BENCH-DEV-{tag}",
+        fbr_pos_reg=f"BP-{tag}"
+    )
+    product = Product(code=f"BENCH-{tag}", name="Bench Product", price=Decimal("100.00"))
+    db.add_all([device, product])
+    db.flush()
+
+    # Seeded as FAILED with a far-off retry so only sync_sale_to_fbr releases them
+    sale_ids = db.execute(text("""
+        WITH new_sales AS (
+            INSERT INTO sales (
+                invoice_no, branch_id, device_id, invoice_date, invoice_type, sale_type_code,
+                seller_ntn, seller_strn, total_qty, total_sales_value, total_tax,
+                total_discount, total_amount, usin, fbr_status, sync_attempts,
+                next_attempt_at, created_at
+            )
+            SELECT
+                'B' || :tag || n, :branch_id, :device_id, NOW(), 'SALE', 'T1000017',
+                '1234567', '1234567', 1, 100.00, 17.00, 0, 117.00,
+                'BENCH-' || :tag || '-' || n, 'FAILED', 0, NOW() + INTERVAL '1 year', NOW()
+            FROM generate_series(1, :sale_count) AS n
+            RETURNING id, invoice_date
+        )
+        INSERT INTO sale_items (
+            sale_id, sale_date, product_id, quantity, unit_price, value_excl_tax, sales_tax, line_total
+        )
+        SELECT id, invoice_date, :product_id, 1, 100.00, 17.00, 17.00, 117.00 FROM new_sales
+        RETURNING sale_id
+    """), {
+        "tag": tag,
+        "branch_id": branch.id,
+        "device_id": device.id,
+        "product_id": product.id,
+        "sale_count": sale_count
+    }).scalars().all()
+    db.commit()
+    return tag, branch, device, product, sorted(sale_ids)
+
+def read_db_load(db):
+    """Snapshot the cumulative pg_stat_database counters for this database"""
+    db.execute(text("SELECT pg_stat_clear_snapshot()"))
+    row = db.execute(text(
+        f"SELECT {', '.join(DB_LOAD_COUNTERS)} FROM pg_stat_database WHERE datname = current_database()"
+    )).one()
+    db.commit()
+    return row._asdict()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def cleanup(db, tag, branch, device, product, sale_ids):
+    """Remove everything the benchmark created"""
+    for start in range(0, len(sale_ids), 10000):
+        chunk = sale_ids[start:start + 10000]
+        db.query(InvoiceSyncLogModel).filter(InvoiceSyncLogModel.sale_id.in_(chunk)).delete(synchronize_session=False)
+        db.query(SaleItemModel).filter(SaleItemModel.sale_id.in_(chunk)).delete(synchronize_session=False)
+        db.query(SaleModel).filter(SaleModel.id.in_(chunk)).delete(synchronize_session=False)
+    db.delete(product)
+    db.delete(device)
+    db.delete(branch)
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FBR sync pipeline")
+    parser.add_argument("--sales", type=int, default=5000, help="sales to seed and sync")
+    parser.add_argument("--workers", type=int, default=2, help="fbr_worker.py processes")
+    parser.add_argument("--batch-size", type=int, default=100, help="invoices claimed per batch")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per worker")
+    parser.add_argument("--url", help="FBR endpoint (default: the local stub)")
+    parser.add_argument("--stall-timeout", type=float, default=30, help="seconds without progress before giving up")
+    parser.add_argument("--start-stub", action="store_true", help="start fbr_stub.py for the run")
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub HTTP 503 rate")
+    parser.add_argument("--rate-limit", type=float, default=0, help="stub requests/sec limit")
+    args = parser.parse_args()
+    url = args.url or f"http://127.0.0.1:{args.stub_port}/PostData"
+
+    Base.metadata.create_all(bind=engine)
+    stub = start_stub(args) if args.start_stub else None
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.sales} sales...")
+        tag, branch, device, product, sale_ids = seed_sales(db, args.sales)
+        load_before = read_db_load(db)
+
+        workers = [
+            subprocess.Popen([
+                sys.executable, os.path.join(BACKEND_DIR, "fbr_worker.py"),
+                "--url", url,
+                "--batch-size", str(args.batch_size),
+                "--concurrency", str(args.concurrency),
+                "--poll-interval", "0.2"
+            ], stdout=subprocess.DEVNULL)
+            for _ in range(args.workers)
+        ]
+
+        # Queue every sale through the API's sync path while the workers run
+        queued_at = {}
+        start = time.time()
+        for sale_id in sale_ids:
+            sync_sale_to_fbr(sale_id, db)
+            queued_at[sale_id] = time.time()
+        queue_seconds = time.time() - start
+
+        # Wait until every sale is synced or progress stalls
+        synced, last_progress = 0, time.time()
+        while synced < len(sale_ids) and time.time() - last_progress < args.stall_timeout:
+            time.sleep(0.5)
+            count = db.query(SaleModel.id).filter(
+                SaleModel.usin.like(f"BENCH-{tag}-%"),
+                SaleModel.fbr_status == FBRStatusEnum.SUCCESS
+            ).count()
+            db.commit()
+            if count > synced:
+                synced, last_progress = count, time.time()
+        drain_seconds = time.time() - start
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+        completed = db.query(
+            InvoiceSyncLogModel.sale_id, InvoiceSyncLogModel.attempted_at
+        ).filter(
+            InvoiceSyncLogModel.sale_id.in_(sale_ids),
+            InvoiceSyncLogModel.status == FBRStatusEnum.SUCCESS
+        ).all()
+        time.sleep(1)  # let the statistics collector flush
+        load_after = read_db_load(db)
+
+        latencies = [row.attempted_at.timestamp() - queued_at[row.sale_id] for row in completed]
+        synced = len(completed)
+        print(f"Queued {len(sale_ids)} sales via sync_sale_to_fbr in {queue_seconds:.2f} s")
+        print(f"Synced {synced}/{len(sale_ids)} with {args.workers} workers in {drain_seconds:.2f} s "
+              f"({synced / drain_seconds:.1f} invoices/sec)")
+        if latencies:
+            print(f"End-to-end latency p50={percentile(latencies, 0.5):.2f} s  "
+                  f"p99={percentile(latencies, 0.99):.2f} s  max={max(latencies):.2f} s")
+        print("Database load during the run:")
+        for counter in DB_LOAD_COUNTERS:
+            delta = load_after[counter] - load_before[counter]
+            print(f"  {counter:<14} {delta:>12}  ({delta / max(synced, 1):.1f} per invoice)")
+
+        cleanup(db, tag, branch, device, product, sale_ids)
+    finally:
+        db.close()
+        if stub:
+            stub.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Product Search Benchmark for FBR Integrated POS System
+This script seeds a synthetic catalog and compares the latency of the old
+name ILIKE '%term%' search with the full-text product search index for a set
+of typical cashier queries. Everything runs in one transaction that is rolled
+back at the end, so the catalog and its change feed are left untouched.
+
+Usage: python benchmark_product_search.py [--products 200000] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import Response
+from sqlalchemy import text
+
+from database import engine, SessionLocal
+from loaders import product_loader_options
+from models import Base, Product as ProductModel
+from routers.products import get_products
+
+BRANDS = ["Shan", "National", "Nestle", "Olpers", "Tapal", "Lipton", "Peek Freans", "Knorr",
+          "Dalda", "Sufi", "Colgate", "Lux", "Surf Excel", "Dettol", "Rafhan", "Mitchells"]
+ITEMS = ["Biryani Masala", "Karahi Mix", "Milk", "Tea", "Biscuits", "Noodles", "Cooking Oil",
+         "Ghee", "Toothpaste", "Soap", "Detergent", "Handwash", "Custard", "Jam", "Ketchup",
+         "Corn Flour", "Chicken Tikka", "Nimco", "Green Tea", "Cream"]
+QUERIES = ["biryani", "nestle mil", "surf", "tea", "8964000123", "chicken tikka 50"]
+
+def seed_catalog(db, product_count):
+    """Insert product_count products with realistic names, barcodes and HS codes"""
+    db.execute(text("""
+        INSERT INTO products (code, name, price, hs_code)
+        SELECT
+            '8964' || lpad(n::text, 9, '0'),
+            (:brands)[1 + n % cardinality(:brands)] || ' ' ||
+            (:items)[1 + (n / cardinality(:brands)) % cardinality(:items)] || ' ' ||
+            (25 + n % 975) || 'g',
+            10 + n % 990,
+            lpad((n % 9999)::text, 4, '0') || '.' || lpad((n % 9000)::text, 4, '0')
+        FROM generate_series(1, :product_count) AS n
+    """), {"brands": BRANDS, "items": ITEMS, "product_count": product_count})
+    db.execute(text("SELECT gin_clean_pending_list('idx_products_search_vector')"))
+    db.execute(text("ANALYZE products"))
+
+def ilike_search(db, term, limit=20):
+    """Product search as implemented before the full-text index"""
+    return db.query(ProductModel).options(*product_loader_options()).filter(
+        ProductModel.name.ilike(f"%{term}%")
+    ).order_by(ProductModel.id).limit(limit).all()
+
+def indexed_search(db, term, limit=20):
+    return get_products(
+        response=Response(), skip=0, limit=limit, cursor=None, search=term,
+        category_id=None, tax_id=None, db=db
+    )
+
+def run_benchmark(db, label, search_fn, term, runs):
+    """Report median latency and result count of one search implementation"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = search_fn(db, term)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"  {label:<8} median={statistics.median(latencies):8.2f} ms  results={len(results)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark product search")
+    parser.add_argument("--products", type=int, default=200000, help="synthetic products to seed")
+    parser.add_argument("--runs", type=int, default=20, help="runs per query and implementation")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.products} products...")
+        seed_catalog(db, args.products)
+        for term in QUERIES:
+            print(f"search={term!r}")
+            run_benchmark(db, "ilike", ilike_search, term, args.runs)
+            run_benchmark(db, "indexed", indexed_search, term, args.runs)
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark for FBR Integrated POS System
+This script compares FastAPI's default response rendering (response_model
+validation, dump to dicts, json.dumps) with the fast_json path for the large
+list endpoints, and checks that both produce the same bytes. Synthetic rows
+are seeded in one transaction that is rolled back at the end.
+
+Usage: python benchmark_serialization.py [--rows 1000] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import text
+
+from database import engine, SessionLocal
+from fast_json import render_json
+from loaders import product_loader_options, sale_loader_options, user_loader_options
+from models import (
+    Base, Product as ProductModel, Customer as CustomerModel, User as UserModel, Sale as SaleModel
+)
+from schemas import Product, Customer, User, Sale
+
+def seed_rows(db, row_count):
+    """Insert row_count products, customers, users and sales with three items each"""
+    params = {"n": row_count}
+    db.execute(text("""
+        INSERT INTO branches (name, ntn, strn, fbr_branch_code, sale_type_code)
+        VALUES ('Bench Branch', '1234567', '1234567', 'BENCH-SERIALIZE', 'T1000017')
+    """))
+    db.execute(text("""
+        INSERT INTO devices (branch_id, name, device_identifier, fbr_pos_reg)
+        SELECT id, 'Bench Device', 'BENCH-SERIALIZE', 'BENCH-SERIALIZE' FROM branches
+        WHERE fbr_branch_code = 'BENCH-SERIALIZE'
+    """))
+    db.execute(text("INSERT INTO categories (name) VALUES ('Bench Category')"))
+    db.execute(text("INSERT INTO tax_rates (name, rate) VALUES ('Bench GST', 17.00)"))
+    db.execute(text("""
+        INSERT INTO products (code, name, price, hs_code, category_id, tax_id)
+        SELECT 'BENCH-' || n, 'Bench Product ' || n, 10 + n % 990 + 0.50, '1905.9090',
+               (SELECT max(id) FROM categories), (SELECT max(id) FROM tax_rates)
+        FROM generate_series(1, :n) AS n
+    """), params)
+    db.execute(text("""
+        INSERT INTO customers (name, ntn, phone, address)
+        SELECT 'Bench Customer ' || n, lpad(n::text, 9, '0'), '0300' || lpad(n::text, 7, '0'), 'Lahore'
+        FROM generate_series(1, :n) AS n
+    """), params)
+    db.execute(text("""
+        INSERT INTO users (username, email, full_name, hashed_password, is_active, is_admin, branch_id)
+        SELECT 'bench' || n, 'bench' || n || '@example.com', 'Bench User ' || n, 'x', true, false,
+               (SELECT id FROM branches WHERE fbr_branch_code = 'BENCH-SERIALIZE')
+        FROM generate_series(1, :n) AS n
+    """), params)
+    db.execute(text("""
+        INSERT INTO sales (invoice_no, branch_id, device_id, invoice_type, sale_type_code, seller_ntn,
+                           seller_strn, total_qty, total_sales_value, total_tax, total_discount,
+                           total_amount, usin, fbr_status, sync_attempts)
+        SELECT 'BENCH-' || n, d.branch_id, d.id, 'SALE', 'T1000017', '1234567', '1234567',
+               3, 30.00, 5.10, 0, 35.10, 'BENCH-' || n, 'PENDING', 0
+        FROM generate_series(1, :n) AS n, devices d WHERE d.device_identifier = 'BENCH-SERIALIZE'
+    """), params)
+    db.execute(text("""
+        INSERT INTO sale_items (sale_id, sale_date, product_id, quantity, unit_price, value_excl_tax, sales_tax,
+                                further_tax, c_v_t, w_h_tax_1, w_h_tax_2, discount, line_total)
+        SELECT s.id, s.invoice_date, p.id, 1, 10.00, 10.00, 1.70, 0, 0, 0, 0, 0, 11.70
+        FROM sales s
+        CROSS JOIN LATERAL (SELECT id FROM products WHERE code LIKE 'BENCH-%' LIMIT 3) p
+        WHERE s.usin LIKE 'BENCH-%'
+    """))
+
+def load_endpoints(db, row_count):
+    """Rows as each list endpoint loads them, with the schema it responds with"""
+    return [
+        ("get_sales", Sale, db.query(SaleModel).options(*sale_loader_options()).filter(
+            SaleModel.usin.like("BENCH-%")
+        ).limit(row_count).all()),
+        ("get_products", Product, db.query(ProductModel).options(*product_loader_options()).filter(
+            ProductModel.code.like("BENCH-%")
+        ).limit(row_count).all()),
+        ("get_customers", Customer, db.query(CustomerModel).filter(
+            CustomerModel.name.like("Bench Customer %")
+        ).limit(row_count).all()),
+        ("get_users", User, db.query(UserModel).options(*user_loader_options()).filter(
+            UserModel.username.like("bench%")
+        ).limit(row_count).all()),
+    ]
+
+def default_render(schema, objects):
+    """Response body as FastAPI renders it for response_model=List[schema]"""
+    field = create_response_field(name="Response", type_=List[schema])
+    content = asyncio.run(serialize_response(field=field, response_content=objects, is_coroutine=False))
+    return JSONResponse(content).body
+
+def fast_render(schema, objects):
+    return render_json(List[schema], objects)
+
+def run_benchmark(label, render_fn, schema, objects, runs):
+    """Report median render time of one implementation and return its body"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = render_fn(schema, objects)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"  {label:<8} median={statistics.median(latencies):8.2f} ms  bytes={len(body)}")
+    return body
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON rendering of list endpoints")
+    parser.add_argument("--rows", type=int, default=1000, help="rows per endpoint")
+    parser.add_argument("--runs", type=int, default=20, help="runs per endpoint and implementation")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.rows} rows per endpoint...")
+        seed_rows(db, args.rows)
+        for name, schema, objects in load_endpoints(db, args.rows):
+            print(f"{name} ({len(objects)} rows)")
+            default_body = run_benchmark("default", default_render, schema, objects, args.runs)
+            fast_body = run_benchmark("fast", fast_render, schema, objects, args.runs)
+            print("  ✅ identical output" if fast_body == default_body else "  ❌ output differs")
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    main()
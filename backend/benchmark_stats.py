@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Sales Stats Benchmark for FBR Integrated POS System
+This script seeds a synthetic month of sales and compares memory use and
+latency of the monthly stats computed in Python, with SQL aggregation over
+the sales table, and from the daily rollup table.
+
+Usage: python benchmark_stats.py [--sales 200000] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, text
+
+from database import engine, SessionLocal
+from models import Base, Branch, Device, Sale as SaleModel, SalesDailyRollup
+from rollups import rebuild_rollup
+from routers.sales import get_monthly_stats
+
+def seed_month(db, sale_count):
+    """Insert sale_count sales spread over the current month for a new branch"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(
+        name=f"Bench Branch {tag}",
+        ntn="1234567",
+        strn="1234567",
+        fbr_branch_code=f"BENCH-{tag}",
+        sale_type_code="T1000017"
+    )
+    db.add(branch)
+    db.flush()
+    device = Device(
+        branch_id=branch.id,
+        name=f"Bench Till {tag}",
+        device_identifier=f"BENCH-DEV-{tag}",
+        fbr_pos_reg=f"BP-{tag}"
+    )
+    db.add(device)
+    db.commit()
+
+    month_start = date.today().replace(day=1)
+    db.execute(text("""
+        INSERT INTO sales (
+            invoice_no, branch_id, device_id, invoice_date, invoice_type, sale_type_code,
+            seller_ntn, seller_strn, total_qty, total_sales_value, total_tax,
+            total_discount, total_amount, usin, fbr_status, sync_attempts, created_at
+        )
+        SELECT
+            'B' || :tag || n, :branch_id, :device_id,
+            CAST(:month_start AS timestamptz) + (NOW() - CAST(:month_start AS timestamptz)) * random(),
+            'SALE', 'T1000017', '1234567', '1234567',
+            3, 300.00, 51.00, 0, 351.00, 'BENCH-' || :tag || '-' || n, 'PENDING', 0, NOW()
+        FROM generate_series(1, :sale_count) AS n
+    """), {
+        "tag": tag,
+        "branch_id": branch.id,
+        "device_id": device.id,
+        "month_start": month_start,
+        "sale_count": sale_count
+    })
+    rebuild_rollup(db, month_start)
+    db.commit()
+    return branch, device
+
+def python_monthly_stats(db):
+    """The monthly stats as computed before SQL aggregation"""
+    current_month = date.today().replace(day=1)
+    sales = db.query(SaleModel).filter(SaleModel.invoice_date >= current_month).all()
+    return {
+        "month": current_month.strftime("%Y-%m"),
+        "total_sales": len(sales),
+        "total_revenue": sum(sale.total_amount for sale in sales),
+        "total_tax": sum(sale.total_tax for sale in sales)
+    }
+
+def scan_monthly_stats(db):
+    """The monthly stats aggregated with COUNT/SUM over the sales table"""
+    current_month = date.today().replace(day=1)
+    row = db.query(
+        func.count(SaleModel.id).label("total_sales"),
+        func.coalesce(func.sum(SaleModel.total_amount), 0).label("total_revenue"),
+        func.coalesce(func.sum(SaleModel.total_tax), 0).label("total_tax")
+    ).filter(SaleModel.invoice_date >= current_month).one()
+    return {"month": current_month.strftime("%Y-%m"), **row._asdict()}
+
+def run_benchmark(label, stats_fn, runs):
+    """Report peak Python memory and latency of a stats implementation"""
+    latencies = []
+    peak = 0
+    result = None
+    for _ in range(runs):
+        db = SessionLocal()
+        try:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = stats_fn(db)
+            latencies.append((time.perf_counter() - start) * 1000)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+            db.close()
+    print(
+        f"{label:<10} median={statistics.median(latencies):9.2f} ms  "
+        f"peak memory={peak / 1024 / 1024:8.2f} MiB  total_sales={result['total_sales']}"
+    )
+
+def cleanup(db, branch, device):
+    """Remove everything the benchmark created"""
+    db.query(SalesDailyRollup).filter(SalesDailyRollup.branch_id == branch.id).delete(synchronize_session=False)
+    db.query(SaleModel).filter(SaleModel.branch_id == branch.id).delete(synchronize_session=False)
+    db.delete(device)
+    db.delete(branch)
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/sales/stats/monthly")
+    parser.add_argument("--sales", type=int, default=200000, help="synthetic sales in the month")
+    parser.add_argument("--runs", type=int, default=5, help="runs per implementation")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.sales} sales for the current month...")
+        branch, device = seed_month(db, args.sales)
+        run_benchmark("python", python_monthly_stats, args.runs)
+        run_benchmark("sql scan", scan_monthly_stats, args.runs)
+        run_benchmark("rollup", lambda session: get_monthly_stats(group_by=None, db=session), args.runs)
+        run_benchmark("rollup/day", lambda session: get_monthly_stats(group_by="day", db=session), args.runs)
+        cleanup(db, branch, device)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
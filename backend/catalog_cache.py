@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from typing import Any, Hashable, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from schemas import Product
+
+# Read-through cache of serialized catalog responses, local to each API
+# process. Writes through the routers invalidate it explicitly; the TTL bounds
+# how long another process's writes can go unseen.
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "250000"))
+
+class TTLCache:
+    """Thread-safe dict with a per-entry expiry time"""
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL, max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, *keys: Hashable):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+product_cache = TTLCache()
+snapshot_cache = TTLCache()
+category_tree_cache = TTLCache()
+
+def render_product(product) -> bytes:
+    """Serialize a Product ORM object exactly as the response_model path would"""
+    return JSONResponse(jsonable_encoder(Product.model_validate(product))).body
+
+def cache_product(product) -> bytes:
+    """Serialize a product and cache it under both its id and its code"""
+    body = render_product(product)
+    product_cache.set(("id", product.id), body)
+    product_cache.set(("code", product.code), body)
+    return body
+
+def invalidate_product(product_id: int, *codes: str):
+    """Drop a product from the cache; pass every code it was cached under"""
+    product_cache.delete(("id", product_id), *(("code", code) for code in codes))
+    snapshot_cache.clear()
+
+def invalidate_snapshot():
+    """Drop the cached catalog snapshot only, e.g. after a tax rate is added"""
+    snapshot_cache.clear()
+
+def invalidate_catalog():
+    """Drop every cached product, e.g. after a category or tax rate changes"""
+    product_cache.clear()
+    snapshot_cache.clear()
+    category_tree_cache.clear()
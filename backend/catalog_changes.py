@@ -0,0 +1,65 @@
+from itertools import chain
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from models import (
+    Product as ProductModel, Category as CategoryModel, TaxRate as TaxRateModel,
+    CatalogTombstone as CatalogTombstoneModel, catalog_change_seq
+)
+
+CATALOG_ENTITIES = {
+    ProductModel: "product",
+    CategoryModel: "category",
+    TaxRateModel: "tax_rate",
+}
+
+# Catalog writers take this transaction-level advisory lock before drawing a
+# sequence number, so change_seq values become visible in commit order and a
+# terminal that has seen seq N can never miss a later commit with seq < N.
+CATALOG_CHANGE_LOCK_ID = 0x43415431
+
+def lock_catalog_writes(db: Session):
+    """Serialize with other catalog writers until the transaction ends"""
+    db.execute(select(func.pg_advisory_xact_lock(CATALOG_CHANGE_LOCK_ID)))
+
+def next_change_seq(db: Session) -> int:
+    """Serialize with other catalog writers and return the next change sequence number"""
+    lock_catalog_writes(db)
+    return db.execute(select(catalog_change_seq.next_value())).scalar_one()
+
+def repeatable_read(db: Session):
+    """Make every following query in this session read the same snapshot"""
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+def current_change_seq(db: Session) -> int:
+    """Highest change sequence number visible to this transaction"""
+    return db.execute(select(func.greatest(
+        select(func.max(ProductModel.change_seq)).scalar_subquery(),
+        select(func.max(CategoryModel.change_seq)).scalar_subquery(),
+        select(func.max(TaxRateModel.change_seq)).scalar_subquery(),
+        select(func.max(CatalogTombstoneModel.change_seq)).scalar_subquery(),
+    ))).scalar() or 0
+
+@event.listens_for(Session, "before_flush")
+def stamp_catalog_changes(session, flush_context, instances):
+    """Give every catalog row written in this flush one shared change_seq, and tombstone deletes"""
+    changed = [
+        obj for obj in chain(session.new, session.dirty)
+        if type(obj) in CATALOG_ENTITIES
+        and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in CATALOG_ENTITIES]
+    if not changed and not deleted:
+        return
+
+    seq = next_change_seq(session)
+    for obj in changed:
+        obj.change_seq = seq
+    for obj in deleted:
+        # Rows whose foreign key the delete will null out change too
+        if isinstance(obj, CategoryModel):
+            for dependent in chain(obj.products, obj.children):
+                dependent.change_seq = seq
+        elif isinstance(obj, TaxRateModel):
+            for dependent in obj.products:
+                dependent.change_seq = seq
+        session.add(CatalogTombstoneModel(entity=CATALOG_ENTITIES[type(obj)], entity_id=obj.id, change_seq=seq))
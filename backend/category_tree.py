@@ -0,0 +1,76 @@
+import json
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from catalog_cache import category_tree_cache
+from models import Category as CategoryModel
+
+categories = CategoryModel.__table__
+
+# Category.path is the chain of ids from the root, e.g. '/1/5/12/'. Every
+# descendant's path starts with its ancestor's path, so a subtree is one range
+# scan on the path index. The mapper events below keep it in sync whichever
+# code path inserts or re-parents a category.
+
+def _parent_path(connection, parent_id) -> str:
+    if parent_id is None:
+        return "/"
+    return connection.execute(
+        select(categories.c.path).where(categories.c.id == parent_id)
+    ).scalar() or "/"
+
+@event.listens_for(CategoryModel, "after_insert")
+def set_category_path(mapper, connection, target):
+    path = f"{_parent_path(connection, target.parent_id)}{target.id}/"
+    connection.execute(update(categories).where(categories.c.id == target.id).values(path=path))
+    set_committed_value(target, "path", path)
+
+@event.listens_for(CategoryModel, "after_update")
+def move_category_subtree(mapper, connection, target):
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    old_path = target.path
+    new_path = f"{_parent_path(connection, target.parent_id)}{target.id}/"
+    if old_path:
+        connection.execute(
+            update(categories).where(
+                categories.c.path >= old_path,
+                categories.c.path < subtree_upper_bound(old_path)
+            ).values(path=new_path + func.substr(categories.c.path, len(old_path) + 1))
+        )
+    else:
+        connection.execute(update(categories).where(categories.c.id == target.id).values(path=new_path))
+    set_committed_value(target, "path", new_path)
+
+def subtree_upper_bound(path):
+    """Smallest path sorting after every path in the subtree: '/1/5/' -> '/1/50'"""
+    if isinstance(path, str):
+        return path[:-1] + "0"
+    return func.left(path, -1) + "0"
+
+def category_subtree_ids(category_id: int):
+    """SELECT of a category's id and the ids of all its descendants"""
+    root_path = select(CategoryModel.path).where(CategoryModel.id == category_id).scalar_subquery()
+    return select(CategoryModel.id).where(
+        CategoryModel.path >= root_path,
+        CategoryModel.path < subtree_upper_bound(root_path)
+    )
+
+def is_in_subtree(category: CategoryModel, root: CategoryModel) -> bool:
+    return bool(category.path and root.path and category.path.startswith(root.path))
+
+def get_category_tree(db: Session) -> bytes:
+    """The whole hierarchy as nested JSON, cached until the next category write"""
+    body = category_tree_cache.get("tree")
+    if body is None:
+        rows = db.query(CategoryModel.id, CategoryModel.name, CategoryModel.parent_id).order_by(
+            CategoryModel.name, CategoryModel.id
+        ).all()
+        nodes = {category_id: {"id": category_id, "name": name, "children": []} for category_id, name, _ in rows}
+        roots = []
+        for category_id, _, parent_id in rows:
+            siblings = nodes[parent_id]["children"] if parent_id in nodes else roots
+            siblings.append(nodes[category_id])
+        body = json.dumps(roots, separators=(",", ":"), ensure_ascii=False).encode()
+        category_tree_cache.set("tree", body)
+    return body
@@ -39,11 +39,16 @@ CREATE TABLE devices (
     created_at         TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Catalog change feed sequence (stamped on every catalog write)
+CREATE SEQUENCE catalog_change_seq;
+
 -- Categories (Product Hierarchy)
 CREATE TABLE categories (
-    id         SERIAL PRIMARY KEY,
-    name       VARCHAR(100) NOT NULL,
-    parent_id  INTEGER REFERENCES categories(id) ON DELETE SET NULL
+    id          SERIAL PRIMARY KEY,
+    name        VARCHAR(100) NOT NULL,
+    parent_id   INTEGER REFERENCES categories(id) ON DELETE SET NULL,
+    path        VARCHAR(500) COLLATE "C",  -- ids from the root, e.g. '/1/5/12/'
+    change_seq  BIGINT NOT NULL DEFAULT nextval('catalog_change_seq')
 );
 
 -- Tax Rates
@@ -51,7 +56,8 @@ CREATE TABLE tax_rates (
     id      SERIAL PRIMARY KEY,
     name    VARCHAR(100) NOT NULL,
     rate    NUMERIC(5,2) NOT NULL,
-    code    VARCHAR(20)    -- FBR SRO Schedule code
+    code    VARCHAR(20),   -- FBR SRO Schedule code
+    change_seq  BIGINT NOT NULL DEFAULT nextval('catalog_change_seq')
 );
 
 -- Products
@@ -63,7 +69,41 @@ CREATE TABLE products (
     price        NUMERIC(12,2) NOT NULL,
     tax_id       INTEGER REFERENCES tax_rates(id) ON DELETE SET NULL,
     hs_code      VARCHAR(20),       -- FBR Harmonized System Code
-    created_at   TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at   TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at   TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    change_seq   BIGINT NOT NULL DEFAULT nextval('catalog_change_seq'),
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', code), 'A') ||
+        setweight(to_tsvector('simple', name), 'B') ||
+        setweight(to_tsvector('simple', coalesce(hs_code, '')), 'C')
+    ) STORED
+);
+
+-- Deleted catalog rows for the change feed
+CREATE TABLE catalog_tombstones (
+    id          SERIAL PRIMARY KEY,
+    entity      VARCHAR(20) NOT NULL,   -- product, category or tax_rate
+    entity_id   INTEGER NOT NULL,
+    change_seq  BIGINT NOT NULL,
+    deleted_at  TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Write counter per table, the basis of the ETags on catalog-style list endpoints
+CREATE TABLE table_versions (
+    table_name  VARCHAR(50) PRIMARY KEY,
+    version     BIGINT NOT NULL DEFAULT 0
+);
+
+-- Months of sales moved to Parquet files by archive_sales.py
+CREATE TABLE sales_archive_months (
+    month          DATE PRIMARY KEY,
+    min_sale_id    INTEGER NOT NULL,
+    max_sale_id    INTEGER NOT NULL,
+    sale_count     INTEGER NOT NULL,
+    item_count     INTEGER NOT NULL,
+    payment_count  INTEGER NOT NULL,
+    path           VARCHAR(500) NOT NULL,
+    archived_at    TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Customers (Optional)
@@ -103,9 +143,14 @@ CREATE TABLE sales (
     fbr_status          fbr_status_enum NOT NULL DEFAULT 'PENDING',
     sync_attempts       INTEGER NOT NULL DEFAULT 0,
     last_synced_at      TIMESTAMP WITH TIME ZONE,
+    next_attempt_at     TIMESTAMP WITH TIME ZONE,   -- FBR retry backoff schedule
     created_at          TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- sales, sale_items, payments and invoice_sync_log are converted to monthly
+-- partitions by migrations/010_partition_sales.sql; run apply_migrations.py
+-- after this script.
+
 -- Sale Items (Line Items)
 CREATE TABLE sale_items (
     id                    SERIAL PRIMARY KEY,
@@ -147,6 +192,33 @@ CREATE TABLE invoice_sync_log (
     attempted_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
+-- FBR Circuit Breaker (single row shared by all sync workers)
+CREATE TABLE fbr_circuit_breaker (
+    id                 INTEGER PRIMARY KEY,
+    state              VARCHAR(10) NOT NULL DEFAULT 'CLOSED',
+    window_started_at  TIMESTAMP WITH TIME ZONE,
+    window_requests    INTEGER NOT NULL DEFAULT 0,
+    window_failures    INTEGER NOT NULL DEFAULT 0,
+    opened_at          TIMESTAMP WITH TIME ZONE,
+    last_error         TEXT,
+    updated_at         TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Daily Sales Rollup (maintained by the API in the same transaction as each sale)
+CREATE TABLE sales_daily_rollup (
+    day                 DATE NOT NULL,
+    branch_id           INTEGER NOT NULL REFERENCES branches(id),
+    device_id           INTEGER NOT NULL REFERENCES devices(id),
+    invoice_type        VARCHAR(20) NOT NULL,
+    sale_count          INTEGER NOT NULL DEFAULT 0,
+    total_qty           NUMERIC(14,2) NOT NULL DEFAULT 0,
+    total_sales_value   NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_tax           NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_discount      NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_amount        NUMERIC(16,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, branch_id, device_id, invoice_type)
+);
+
 -- Users (System Users for POS Management)
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
@@ -167,15 +239,35 @@ CREATE INDEX idx_sales_usin ON sales(usin);
 CREATE INDEX idx_sales_branch_id ON sales(branch_id);
 CREATE INDEX idx_sales_device_id ON sales(device_id);
 CREATE INDEX idx_sales_invoice_date ON sales(invoice_date);
+CREATE INDEX idx_sales_created_at_id ON sales(created_at, id);
+CREATE INDEX idx_sales_fbr_unsynced ON sales(id) WHERE fbr_status <> 'SUCCESS';
 CREATE INDEX idx_sale_items_sale_id ON sale_items(sale_id);
 CREATE INDEX idx_sale_items_product_id ON sale_items(product_id);
 CREATE INDEX idx_payments_sale_id ON payments(sale_id);
 CREATE INDEX idx_products_code ON products(code);
 CREATE INDEX idx_products_category_id ON products(category_id);
+CREATE INDEX idx_products_search_vector ON products USING GIN (search_vector);
+-- Trigram indexes for the substring fallback of product search (needs pg_trgm)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX idx_products_code_trgm ON products USING GIN (code gin_trgm_ops);
+        CREATE INDEX idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+        CREATE INDEX idx_products_hs_code_trgm ON products USING GIN (hs_code gin_trgm_ops);
+    END IF;
+END
+$$;
 CREATE INDEX idx_devices_branch_id ON devices(branch_id);
 CREATE INDEX idx_devices_fbr_pos_reg ON devices(fbr_pos_reg);
 CREATE INDEX idx_branches_fbr_branch_code ON branches(fbr_branch_code);
 CREATE INDEX idx_categories_parent_id ON categories(parent_id);
+CREATE INDEX ix_tax_rates_change_seq ON tax_rates(change_seq);
+CREATE INDEX ix_categories_change_seq ON categories(change_seq);
+CREATE INDEX ix_categories_path ON categories(path);
+CREATE INDEX idx_sales_archive_months_sale_ids ON sales_archive_months(min_sale_id, max_sale_id);
+CREATE INDEX ix_products_change_seq ON products(change_seq);
+CREATE INDEX ix_catalog_tombstones_change_seq ON catalog_tombstones(change_seq);
 
 -- Insert default tax rates
 INSERT INTO tax_rates (name, rate, code) VALUES 
@@ -190,6 +282,8 @@ INSERT INTO categories (name) VALUES
 ('Clothing'),
 ('Food & Beverages'),
 ('Home & Garden');
+-- Top-level categories: their path is their own id (category_tree.py sets it for ORM inserts)
+UPDATE categories SET path = '/' || id || '/' WHERE parent_id IS NULL AND path IS NULL;
 
 -- Insert sample branch (update with your actual data)
 INSERT INTO branches (name, address, city, province, ntn, strn, fbr_branch_code) VALUES 
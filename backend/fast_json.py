@@ -0,0 +1,30 @@
+import os
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Opt-in: large list endpoints validate ORM rows and write JSON bytes in one
+# pass through pydantic-core instead of FastAPI's validate, dump to dicts and
+# json.dumps pipeline. The bytes are identical either way.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+def render_json(schema, objects: Any) -> bytes:
+    """Validate objects (ORM rows or models) against schema and serialize them to JSON bytes.
+
+    Decimals are written as strings with their scale, as response_model does.
+    """
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+def json_response(schema, objects: Any, response: Optional[Response] = None) -> Response:
+    """render_json as a Response, keeping headers set on the endpoint's Response parameter"""
+    return Response(
+        content=render_json(schema, objects),
+        media_type="application/json",
+        headers=dict(response.headers) if response is not None else None
+    )
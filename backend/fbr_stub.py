@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+FBR Stub Server for FBR Integrated POS System
+This script serves a local stand-in for the FBR invoice endpoint so the sync
+worker can be tested and benchmarked without FBR access. Latency, error rate,
+rejection rate and rate limiting are configurable.
+
+Usage: python fbr_stub.py [--port 8099] [--latency-ms 50] [--error-rate 0.01] [--rate-limit 200]
+Then run the worker with FBR_API_URL=http://127.0.0.1:8099/PostData
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+class StubConfig:
+    latency_ms = 50.0
+    latency_jitter_ms = 10.0
+    error_rate = 0.0
+    reject_rate = 0.0
+    rate_limit = 0.0  # requests per second, 0 for unlimited
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts of up to `rate` requests"""
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+config = StubConfig()
+bucket = None
+counters = {"received": 0, "accepted": 0, "rejected": 0, "errors": 0, "throttled": 0}
+
+app = FastAPI(title="FBR Stub", description="Local stand-in for the FBR invoice API")
+
+@app.post("/PostData")
+async def post_invoice(request: Request):
+    counters["received"] += 1
+    if bucket and not bucket.take():
+        counters["throttled"] += 1
+        return JSONResponse({"message": "Too many requests"}, status_code=429)
+
+    payload = await request.json()
+    delay = max(0.0, random.gauss(config.latency_ms, config.latency_jitter_ms)) / 1000
+    await asyncio.sleep(delay)
+
+    roll = random.random()
+    if roll < config.error_rate:
+        counters["errors"] += 1
+        return JSONResponse({"message": "Service unavailable"}, status_code=503)
+    if roll < config.error_rate + config.reject_rate:
+        counters["rejected"] += 1
+        return JSONResponse({
+            "InvoiceNumber": None,
+            "Code": "401",
+            "Response": "Invoice rejected",
+            "Errors": "Invalid invoice data"
+        })
+
+    counters["accepted"] += 1
+    invoice_number = f"{payload.get('pos_id', 'POS')}{int(time.time() * 1000)}{counters['accepted']}"
+    return {
+        "InvoiceNumber": invoice_number[:50],
+        "Code": "100",
+        "Response": "Fiscal Invoice Number generated successfully.",
+        "Errors": None
+    }
+
+@app.get("/stats")
+def get_stats():
+    return counters
+
+def main():
+    global bucket
+    parser = argparse.ArgumentParser(description="Run a local FBR invoice endpoint stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms, help="mean response latency")
+    parser.add_argument("--latency-jitter-ms", type=float, default=StubConfig.latency_jitter_ms, help="latency std deviation")
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate, help="fraction of HTTP 503 replies")
+    parser.add_argument("--reject-rate", type=float, default=StubConfig.reject_rate, help="fraction of rejected invoices")
+    parser.add_argument("--rate-limit", type=float, default=StubConfig.rate_limit, help="requests/sec before HTTP 429 (0 = off)")
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.latency_jitter_ms = args.latency_jitter_ms
+    config.error_rate = args.error_rate
+    config.reject_rate = args.reject_rate
+    config.rate_limit = args.rate_limit
+    bucket = TokenBucket(args.rate_limit) if args.rate_limit > 0 else None
+
+    print(f"🔄 FBR stub listening on http://{args.host}:{args.port}/PostData")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
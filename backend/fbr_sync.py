@@ -0,0 +1,386 @@
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from models import (
+    Sale as SaleModel,
+    SaleItem as SaleItemModel,
+    InvoiceSyncLog as InvoiceSyncLogModel,
+    FBRCircuitBreaker as FBRCircuitBreakerModel,
+    FBRStatusEnum
+)
+from schemas import FBRInvoicePayload, FBRResponse
+
+logger = logging.getLogger(__name__)
+
+# FBR sync configuration
+FBR_API_URL = os.getenv("FBR_API_URL", "https://gw.fbr.gov.pk/imsp/v1/api/Live/PostData")
+FBR_API_KEY = os.getenv("FBR_API_KEY", "")
+FBR_BATCH_SIZE = int(os.getenv("FBR_BATCH_SIZE", "100"))
+FBR_CONCURRENCY = int(os.getenv("FBR_CONCURRENCY", "8"))
+FBR_TIMEOUT = float(os.getenv("FBR_TIMEOUT", "10"))
+# A claimed (SENT) invoice whose worker died is reclaimed after this many seconds
+FBR_CLAIM_TIMEOUT = int(os.getenv("FBR_CLAIM_TIMEOUT", "300"))
+# Failed invoices are retried after FBR_BACKOFF_BASE * 2^(attempt - 1) seconds,
+# capped at FBR_BACKOFF_MAX, with the upper half of the delay randomized
+FBR_BACKOFF_BASE = float(os.getenv("FBR_BACKOFF_BASE", "30"))
+FBR_BACKOFF_MAX = float(os.getenv("FBR_BACKOFF_MAX", "3600"))
+# Invoices FBR rejects, or still failing after FBR_MAX_ATTEMPTS attempts, stay
+# FAILED with no next_attempt_at; only POST /api/sales/{id}/sync-fbr retries them
+FBR_MAX_ATTEMPTS = int(os.getenv("FBR_MAX_ATTEMPTS", "24"))
+# The circuit opens when at least FBR_BREAKER_MIN_REQUESTS requests within
+# FBR_BREAKER_WINDOW seconds fail at FBR_BREAKER_ERROR_RATE or more, and a
+# single probe invoice is tried after FBR_BREAKER_COOLDOWN seconds
+FBR_BREAKER_ERROR_RATE = float(os.getenv("FBR_BREAKER_ERROR_RATE", "0.5"))
+FBR_BREAKER_MIN_REQUESTS = int(os.getenv("FBR_BREAKER_MIN_REQUESTS", "20"))
+FBR_BREAKER_WINDOW = int(os.getenv("FBR_BREAKER_WINDOW", "60"))
+FBR_BREAKER_COOLDOWN = int(os.getenv("FBR_BREAKER_COOLDOWN", "60"))
+
+BREAKER_CLOSED = "CLOSED"
+BREAKER_OPEN = "OPEN"
+BREAKER_HALF_OPEN = "HALF_OPEN"
+
+class SyncResult:
+    """Outcome of posting one invoice to FBR"""
+    def __init__(self, sale_id: int, invoice_date: datetime, attempt_no: int, payload: dict):
+        self.sale_id = sale_id
+        self.invoice_date = invoice_date  # with sale_id, the key of the sale's partition row
+        self.attempt_no = attempt_no
+        self.payload = payload
+        self.response: Optional[dict] = None
+        self.fbr_response: Optional[FBRResponse] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return (
+            self.fbr_response is not None
+            and self.fbr_response.status == FBRStatusEnum.SUCCESS.value
+            and bool(self.fbr_response.invoice_number)
+        )
+
+    @property
+    def transient_failure(self) -> bool:
+        """True when FBR was unreachable or overloaded rather than rejecting the invoice"""
+        if self.succeeded or self.response is None:
+            return False
+        http_status = self.response.get("http_status")
+        return http_status is None or http_status >= 500 or http_status == 429
+
+    @property
+    def retry_scheduled(self) -> bool:
+        """True when the worker should try the invoice again after a backoff delay"""
+        return self.transient_failure and self.attempt_no < FBR_MAX_ATTEMPTS
+
+def backoff_delay(attempt_no: int) -> float:
+    """Seconds to wait before retrying after the given failed attempt"""
+    delay = min(FBR_BACKOFF_MAX, FBR_BACKOFF_BASE * 2 ** max(attempt_no - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def build_fbr_payload(sale: SaleModel) -> FBRInvoicePayload:
+    """Build the FBR invoice payload for a sale with its device and items loaded"""
+    return FBRInvoicePayload(
+        invoice_number=sale.usin,
+        pos_id=sale.device.fbr_pos_reg,
+        buyer_ntn=sale.buyer_ntn,
+        buyer_name=sale.buyer_name,
+        invoice_date=sale.invoice_date.strftime("%Y-%m-%d %H:%M:%S"),
+        invoice_type=sale.invoice_type.value,
+        sale_type_code=sale.sale_type_code,
+        seller_ntn=sale.seller_ntn,
+        seller_strn=sale.seller_strn,
+        total_amount=sale.total_amount,
+        total_tax=sale.total_tax,
+        items=[
+            {
+                "item_code": item.product.code,
+                "item_name": item.product.name,
+                "hs_code": item.hs_code or item.product.hs_code,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "sale_value": item.value_excl_tax,
+                "tax_charged": item.sales_tax,
+                "further_tax": item.further_tax,
+                "discount": item.discount,
+                "sro_item_serial_no": item.sro_item_serial_no,
+                "total_amount": item.line_total
+            }
+            for item in sale.items
+        ]
+    )
+
+def parse_fbr_response(status_code: int, body: dict) -> FBRResponse:
+    """Normalize an FBR reply (PRAL 'Code'/'Response' style or FBRResponse style)"""
+    if "Code" in body:
+        succeeded = str(body.get("Code")) == "100" and status_code < 300
+        return FBRResponse(
+            status=FBRStatusEnum.SUCCESS.value if succeeded else FBRStatusEnum.FAILED.value,
+            message=str(body.get("Response") or ""),
+            invoice_number=body.get("InvoiceNumber") if succeeded else None,
+            qr_code=body.get("QRCode"),
+            error_details={"errors": body.get("Errors")} if body.get("Errors") else None
+        )
+
+    if status_code >= 300:
+        return FBRResponse(
+            status=FBRStatusEnum.FAILED.value,
+            message=str(body.get("message") or f"HTTP {status_code}"),
+            invoice_number=None,
+            qr_code=None,
+            error_details=body or None
+        )
+    return FBRResponse(
+        status=body.get("status", FBRStatusEnum.FAILED.value),
+        message=body.get("message", ""),
+        invoice_number=body.get("invoice_number"),
+        qr_code=body.get("qr_code"),
+        error_details=body.get("error_details")
+    )
+
+class FBRClient:
+    """Posts invoices to the FBR endpoint over a pooled HTTP connection"""
+    def __init__(self, url: str = FBR_API_URL, api_key: str = FBR_API_KEY,
+                 timeout: float = FBR_TIMEOUT, concurrency: int = FBR_CONCURRENCY):
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.url = url
+        self.concurrency = concurrency
+        self.http = httpx.Client(
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+    def post_invoice(self, result: SyncResult) -> SyncResult:
+        try:
+            reply = self.http.post(self.url, json=result.payload)
+            try:
+                body = reply.json()
+            except ValueError:
+                body = {"message": reply.text[:500]}
+            if not isinstance(body, dict):
+                body = {"message": str(body)[:500]}
+            result.response = {"http_status": reply.status_code, "body": body}
+            result.fbr_response = parse_fbr_response(reply.status_code, body)
+        except httpx.HTTPError as e:
+            result.response = {"http_status": None, "error": str(e)}
+            result.fbr_response = FBRResponse(
+                status=FBRStatusEnum.FAILED.value,
+                message=str(e),
+                invoice_number=None,
+                qr_code=None,
+                error_details={"error": e.__class__.__name__}
+            )
+        return result
+
+    def post_invoices(self, results: List[SyncResult]) -> List[SyncResult]:
+        """Post a batch of invoices with up to `concurrency` requests in flight"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(self.post_invoice, results))
+
+    def close(self):
+        self.http.close()
+
+class CircuitBreaker:
+    """Pauses FBR submissions for every worker while FBR is failing
+
+    The state lives in the single fbr_circuit_breaker row so all worker
+    processes and the API see the same breaker.
+    """
+    def __init__(self, error_rate: float = FBR_BREAKER_ERROR_RATE,
+                 min_requests: int = FBR_BREAKER_MIN_REQUESTS,
+                 window: int = FBR_BREAKER_WINDOW, cooldown: int = FBR_BREAKER_COOLDOWN):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = timedelta(seconds=window)
+        self.cooldown = timedelta(seconds=cooldown)
+
+    def _lock_state(self, db: Session) -> FBRCircuitBreakerModel:
+        db.execute(pg_insert(FBRCircuitBreakerModel).values(
+            id=1, state=BREAKER_CLOSED, window_requests=0, window_failures=0
+        ).on_conflict_do_nothing(index_elements=["id"]))
+        return db.query(FBRCircuitBreakerModel).filter(
+            FBRCircuitBreakerModel.id == 1
+        ).with_for_update().one()
+
+    def acquire(self, db: Session, batch_size: int) -> int:
+        """Return how many invoices may be sent now: 0 while open, 1 for a probe"""
+        now = datetime.now(timezone.utc)
+        state = self._lock_state(db)
+        allowed = batch_size
+        if state.state != BREAKER_CLOSED:
+            if now - state.opened_at >= self.cooldown:
+                # Let this worker probe FBR with a single invoice
+                state.state = BREAKER_HALF_OPEN
+                state.opened_at = now
+                allowed = 1
+            else:
+                allowed = 0
+        db.commit()
+        return allowed
+
+    def record(self, db: Session, results: List[SyncResult]):
+        """Update the breaker with the outcome of a batch"""
+        now = datetime.now(timezone.utc)
+        failures = [result for result in results if result.transient_failure]
+        state = self._lock_state(db)
+
+        if failures:
+            state.last_error = str(failures[-1].fbr_response.message)[:500]
+
+        if state.state == BREAKER_HALF_OPEN:
+            if failures:
+                state.state = BREAKER_OPEN
+                state.opened_at = now
+            else:
+                state.state = BREAKER_CLOSED
+                state.window_started_at = now
+                state.window_requests = 0
+                state.window_failures = 0
+        elif state.state == BREAKER_CLOSED:
+            if not state.window_started_at or now - state.window_started_at > self.window:
+                state.window_started_at = now
+                state.window_requests = 0
+                state.window_failures = 0
+            state.window_requests += len(results)
+            state.window_failures += len(failures)
+            if (state.window_requests >= self.min_requests
+                    and state.window_failures >= self.error_rate * state.window_requests):
+                state.state = BREAKER_OPEN
+                state.opened_at = now
+                logger.warning("FBR circuit opened: %d of %d requests failed",
+                               state.window_failures, state.window_requests)
+        db.commit()
+
+def get_breaker_status(db: Session) -> dict:
+    """Current circuit breaker state for status endpoints"""
+    state = db.query(FBRCircuitBreakerModel).filter(FBRCircuitBreakerModel.id == 1).first()
+    if not state:
+        return {"state": BREAKER_CLOSED, "window_requests": 0, "window_failures": 0}
+    return {
+        "state": state.state,
+        "window_started_at": state.window_started_at,
+        "window_requests": state.window_requests,
+        "window_failures": state.window_failures,
+        "opened_at": state.opened_at,
+        "retry_after": state.opened_at + timedelta(seconds=FBR_BREAKER_COOLDOWN)
+            if state.state == BREAKER_OPEN else None,
+        "last_error": state.last_error
+    }
+
+def _claimable(now: datetime):
+    """Sales due for a submission at now"""
+    return or_(
+        and_(
+            SaleModel.fbr_status == FBRStatusEnum.PENDING,
+            or_(SaleModel.next_attempt_at.is_(None), SaleModel.next_attempt_at <= now)
+        ),
+        and_(SaleModel.fbr_status == FBRStatusEnum.FAILED, SaleModel.next_attempt_at <= now),
+        and_(
+            SaleModel.fbr_status == FBRStatusEnum.SENT,
+            SaleModel.last_synced_at < now - timedelta(seconds=FBR_CLAIM_TIMEOUT)
+        )
+    )
+
+def claim_sales(db: Session, batch_size: int = FBR_BATCH_SIZE) -> List[int]:
+    """Claim up to batch_size unsynced sales for this worker and mark them SENT
+
+    Rows locked by another worker are skipped, so several workers can drain
+    the queue concurrently without claiming the same invoice twice. FAILED
+    sales without a next_attempt_at are given up on and are not claimed.
+    """
+    now = datetime.now(timezone.utc)
+    claimable = select(SaleModel.id).where(_claimable(now)).order_by(
+        SaleModel.id
+    ).limit(batch_size).with_for_update(skip_locked=True)
+
+    claimed = db.execute(
+        update(SaleModel)
+        .where(SaleModel.id.in_(claimable.scalar_subquery()))
+        .values(
+            fbr_status=FBRStatusEnum.SENT,
+            sync_attempts=SaleModel.sync_attempts + 1,
+            last_synced_at=now
+        )
+        .returning(SaleModel.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    return sorted(claimed)
+
+def prepare_batch(db: Session, sale_ids: List[int]) -> List[SyncResult]:
+    """Load claimed sales and build their FBR payloads"""
+    sales = db.query(SaleModel).options(
+        joinedload(SaleModel.device),
+        selectinload(SaleModel.items).joinedload(SaleItemModel.product)
+    ).filter(SaleModel.id.in_(sale_ids)).order_by(SaleModel.id).all()
+
+    results = [
+        SyncResult(sale.id, sale.invoice_date, sale.sync_attempts, jsonable_encoder(build_fbr_payload(sale)))
+        for sale in sales
+    ]
+    # Do not hold a transaction open while waiting on FBR
+    db.rollback()
+    return results
+
+def record_results(db: Session, results: List[SyncResult]):
+    """Write FBR outcomes back to sales and the sync log in bulk"""
+    if not results:
+        return
+
+    now = datetime.now(timezone.utc)
+    db.execute(update(SaleModel), [
+        {
+            "id": result.sale_id,
+            "invoice_date": result.invoice_date,
+            "fbr_status": FBRStatusEnum.SUCCESS if result.succeeded else FBRStatusEnum.FAILED,
+            "fbr_payload": result.payload,
+            "fbr_response": result.response,
+            "fbr_invoice_no": result.fbr_response.invoice_number if result.succeeded else None,
+            "qr_payload": (result.fbr_response.qr_code or result.fbr_response.invoice_number)
+                if result.succeeded else None,
+            "next_attempt_at": now + timedelta(seconds=backoff_delay(result.attempt_no))
+                if result.retry_scheduled else None
+        }
+        for result in results
+    ])
+    db.execute(insert(InvoiceSyncLogModel), [
+        {
+            "sale_id": result.sale_id,
+            "attempt_no": result.attempt_no,
+            "payload": result.payload,
+            "response": result.response,
+            "status": FBRStatusEnum.SUCCESS if result.succeeded else FBRStatusEnum.FAILED
+        }
+        for result in results
+    ])
+    db.commit()
+
+def sync_batch(db: Session, client: FBRClient, breaker: CircuitBreaker,
+               batch_size: int = FBR_BATCH_SIZE) -> List[SyncResult]:
+    """Claim, post and record one batch; returns the results (empty when idle or paused)"""
+    allowed = breaker.acquire(db, batch_size)
+    if not allowed:
+        return []
+
+    sale_ids = claim_sales(db, allowed)
+    if not sale_ids:
+        return []
+
+    results = client.post_invoices(prepare_batch(db, sale_ids))
+    record_results(db, results)
+    breaker.record(db, results)
+
+    succeeded = sum(1 for result in results if result.succeeded)
+    logger.info("FBR batch: %d sent, %d succeeded, %d failed",
+                len(results), succeeded, len(results) - succeeded)
+    return results
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+FBR Sync Worker for FBR Integrated POS System
+This script posts PENDING invoices and FAILED invoices due for a retry to FBR
+in batches, outside the API process. Several workers can run side by side;
+each claims its own rows with FOR UPDATE SKIP LOCKED.
+
+Usage: python fbr_worker.py [--batch-size 100] [--concurrency 8] [--once]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal
+from fbr_sync import CircuitBreaker, FBRClient, FBR_API_URL, FBR_BATCH_SIZE, FBR_CONCURRENCY, sync_batch
+
+FBR_POLL_INTERVAL = float(os.getenv("FBR_POLL_INTERVAL", "2"))
+
+stopping = False
+
+def request_stop(signum, frame):
+    """Finish the current batch, then exit"""
+    global stopping
+    stopping = True
+
+def run_worker(url, batch_size, concurrency, poll_interval, once=False):
+    """Sync batches until stopped; sleep only when the queue is empty, the circuit is open
+    or a batch failed. With once, return when the queue is empty and raise if a batch fails."""
+    client = FBRClient(url=url, concurrency=concurrency)
+    breaker = CircuitBreaker()
+    db = SessionLocal()
+    total = 0
+    try:
+        while not stopping:
+            try:
+                results = sync_batch(db, client, breaker, batch_size)
+            except Exception:
+                logging.exception("FBR batch failed")
+                db.rollback()
+                if once:
+                    raise
+                # Wait one poll interval, as when idle, before trying again
+                results = []
+            total += len(results)
+            if not results:
+                if once:
+                    break
+                time.sleep(poll_interval)
+    finally:
+        db.close()
+        client.close()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Post pending invoices to FBR")
+    parser.add_argument("--url", default=FBR_API_URL, help="FBR invoice endpoint")
+    parser.add_argument("--batch-size", type=int, default=FBR_BATCH_SIZE, help="invoices claimed per batch")
+    parser.add_argument("--concurrency", type=int, default=FBR_CONCURRENCY, help="requests in flight per worker")
+    parser.add_argument("--poll-interval", type=float, default=FBR_POLL_INTERVAL, help="seconds to wait when idle")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    print(f"🔄 FBR sync worker posting to {args.url}")
+    try:
+        total = run_worker(args.url, args.batch_size, args.concurrency, args.poll_interval, args.once)
+    except Exception as e:
+        print(f"❌ FBR sync worker failed: {e}")
+        sys.exit(1)
+    print(f"✅ FBR sync worker stopped after {total} invoices")
+
+if __name__ == "__main__":
+    main()
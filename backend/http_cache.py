@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from table_versions import get_table_versions
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match lists etag, by weak comparison"""
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or etag.removeprefix("W/") in [
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ]
+
+def table_etag(db: Session, *tables: str) -> str:
+    """ETag from the versions of every table a response is built from.
+
+    Weak, since the identity, gzip and brotli encodings of a response share it.
+    """
+    versions = get_table_versions(db, tables)
+    return 'W/"' + "-".join(str(versions[table]) for table in tables) + '"'
+
+def conditional_get(request: Request, response: Response, db: Session, *tables: str) -> Optional[Response]:
+    """Return a 304 if the client's copy is current; otherwise set the ETag on response.
+
+    Only the table versions are read, so an unchanged list costs no row fetch.
+    """
+    etag = table_etag(db, *tables)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Product Import Script for FBR Integrated POS System
+This script upserts products by code from a CSV or NDJSON file, e.g. a
+supplier price list. Required columns are code, name and price; category_id,
+tax_id and hs_code are optional and left unchanged when absent from the CSV
+header or the NDJSON record.
+
+Usage: python import_products.py price_list.csv [--format csv|ndjson]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine, SessionLocal
+from models import Base
+from product_import import import_products
+
+def main():
+    parser = argparse.ArgumentParser(description="Import products from CSV or NDJSON")
+    parser.add_argument("path", help="file to import")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    args = parser.parse_args()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            report = import_products(db, f, fmt)
+        db.commit()
+        elapsed = time.perf_counter() - start
+        print(
+            f"✅ Imported {report['rows']} rows in {elapsed:.2f} s ({report['rows'] / elapsed:.0f} rows/sec): "
+            f"{report['inserted']} inserted, {report['updated']} updated, "
+            f"{report['unchanged']} unchanged, {report['failed']} failed"
+        )
+        for error in report["errors"]:
+            print(f"❌ Line {error['line']} ({error['code']}): {error['error']}")
+    except Exception as e:
+        print(f"❌ Error importing products: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models import Sale, SaleItem, Product, Category, Device, User
+
+# Loader options matching the nested response schemas, so serializing a list
+# costs a fixed number of statements instead of one lazy load per row
+
+def product_loader_options():
+    """Eager-load everything serialized by schemas.Product"""
+    return (
+        joinedload(Product.category).options(
+            joinedload(Category.parent),
+            selectinload(Category.children)
+        ),
+        joinedload(Product.tax_rate),
+    )
+
+def sale_loader_options():
+    """Eager-load everything serialized by schemas.Sale"""
+    return (
+        joinedload(Sale.branch),
+        joinedload(Sale.device).joinedload(Device.branch),
+        joinedload(Sale.customer),
+        selectinload(Sale.items).options(
+            joinedload(SaleItem.product).options(
+                joinedload(Product.category).options(
+                    joinedload(Category.parent),
+                    selectinload(Category.children)
+                ),
+                joinedload(Product.tax_rate)
+            )
+        ),
+        selectinload(Sale.payments),
+    )
+
+def category_loader_options():
+    """Eager-load everything serialized by schemas.Category"""
+    return (joinedload(Category.parent), selectinload(Category.children))
+
+def device_loader_options():
+    """Eager-load everything serialized by schemas.Device"""
+    return (joinedload(Device.branch),)
+
+def user_loader_options():
+    """Eager-load everything serialized by schemas.User"""
+    return (joinedload(User.branch),)
@@ -2,11 +2,18 @@ from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List
+import asyncio
+import logging
 import uvicorn
 
-from database import engine, get_db
-from models import Base
-from routers import products, sales, categories, branches, devices, tax_rates, customers, users
+from sqlalchemy import func
+
+from compression import CompressionMiddleware
+from database import PRIMARY_CONNECTION_BUDGET, engine, async_engine, async_replica_engine, get_db
+from models import Base, Sale as SaleModel, FBRStatusEnum
+from fbr_sync import get_breaker_status
+from partitions import PARTITION_CHECK_INTERVAL, ensure_partitions
+from routers import products, sales, categories, branches, devices, tax_rates, customers, users, catalog, metrics
 from schemas import ProductCreate, Product, SaleCreate, Sale, CategoryCreate, Category
 
 # Create database tables
@@ -25,8 +32,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Compress responses of 1 KB and up with brotli or gzip, per Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
+
 # Include routers
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(sales.router, prefix="/api/sales", tags=["sales"])
@@ -36,6 +47,55 @@ app.include_router(branches.router, prefix="/api/branches", tags=["branches"])
 app.include_router(devices.router, prefix="/api/devices", tags=["devices"])
 app.include_router(tax_rates.router, prefix="/api/tax-rates", tags=["tax-rates"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
+app.include_router(catalog.router, prefix="/api/catalog", tags=["catalog"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+
+def create_upcoming_partitions():
+    try:
+        with engine.begin() as conn:
+            created = ensure_partitions(conn)
+        if created:
+            logging.info("Created partitions %s", ", ".join(created))
+    except Exception:
+        logging.exception("Could not create upcoming sales partitions")
+
+async def maintain_partitions():
+    """Keep PARTITION_MONTHS_AHEAD months of partitions for as long as the API runs"""
+    while True:
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+        await asyncio.to_thread(create_upcoming_partitions)
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    # The first run finishes before requests are served, e.g. on a new database
+    await asyncio.to_thread(create_upcoming_partitions)
+    app.state.partition_task = asyncio.create_task(maintain_partitions())
+
+@app.on_event("startup")
+def check_connection_budget():
+    try:
+        with engine.connect() as conn:
+            max_connections = int(conn.exec_driver_sql("SHOW max_connections").scalar())
+    except Exception:
+        logging.exception("Could not read max_connections")
+        return
+    logging.info("This process opens up to %d of the server's %d connections", PRIMARY_CONNECTION_BUDGET, max_connections)
+    if PRIMARY_CONNECTION_BUDGET > max_connections // 2:
+        logging.warning(
+            "DB_POOL_SIZE + DB_MAX_OVERFLOW + ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW = %d leaves room for "
+            "fewer than two API processes within max_connections = %d", PRIMARY_CONNECTION_BUDGET, max_connections
+        )
+
+@app.on_event("shutdown")
+async def stop_partition_maintenance():
+    app.state.partition_task.cancel()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    # asyncpg connections belong to the event loop that opened them
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
 
 @app.get("/")
 async def root():
@@ -46,8 +106,12 @@ async def health_check():
     return {"status": "healthy", "message": "FBR Integrated POS System is operational"}
 
 @app.get("/api/fbr-status")
-async def fbr_status():
-    """Get FBR integration status"""
+def fbr_status(db: Session = Depends(get_db)):
+    """Get FBR integration status, sync queue and circuit breaker state"""
+    queue = db.query(SaleModel.fbr_status, func.count(SaleModel.id)).filter(
+        SaleModel.fbr_status != FBRStatusEnum.SUCCESS
+    ).group_by(SaleModel.fbr_status).all()
+    
     return {
         "fbr_integration": "enabled",
         "compliance": "FBR POS Integration Ready",
@@ -57,7 +121,9 @@ async def fbr_status():
             "FBR Sync",
             "QR Code Generation",
             "Audit Trail"
-        ]
+        ],
+        "sync_queue": {status.value: count for status, count in queue},
+        "circuit_breaker": get_breaker_status(db)
     }
 
 if __name__ == "__main__":
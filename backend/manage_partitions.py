@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Partition Manager for FBR Integrated POS System
+This script creates the monthly partitions of sales, sale_items, payments and
+invoice_sync_log ahead of time and detaches old months. The API runs `ensure`
+when it starts and every PARTITION_CHECK_INTERVAL seconds; run it by hand to
+create partitions for earlier months or when the API is down.
+
+Usage: python manage_partitions.py ensure [--from YYYY-MM] [--months-ahead 3]
+       python manage_partitions.py list
+       python manage_partitions.py detach YYYY-MM
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+from partitions import PARTITION_MONTHS_AHEAD, PARTITIONED_TABLES, detach_month, ensure_partitions, list_partitions
+
+def parse_month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the monthly sales partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create missing partitions through --months-ahead")
+    ensure.add_argument("--from", dest="start", type=parse_month, help="first month to create (default: this month)")
+    ensure.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD, help="months after this one")
+    commands.add_parser("list", help="show the attached partitions")
+    detach = commands.add_parser("detach", help="detach one month from every partitioned table")
+    detach.add_argument("month", type=parse_month, help="month to detach, e.g. 2024-01")
+    args = parser.parse_args()
+
+    try:
+        with engine.begin() as conn:
+            if args.command == "ensure":
+                created = ensure_partitions(conn, args.start, args.months_ahead)
+                print(f"✅ Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+            elif args.command == "list":
+                for table in PARTITIONED_TABLES:
+                    print(f"{table}:")
+                    for name, bound in list_partitions(conn, table).items():
+                        print(f"  {name}  {bound}")
+            else:
+                detached = detach_month(conn, args.month)
+                if detached:
+                    print(f"✅ Detached {', '.join(detached)}; dump or drop these tables when no longer needed")
+                else:
+                    print(f"No partitions attached for {args.month:%Y-%m}")
+    except Exception as e:
+        print(f"❌ Error managing partitions: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
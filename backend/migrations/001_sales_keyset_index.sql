@@ -0,0 +1,2 @@
+-- Keyset pagination for sales listings orders by (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_sales_created_at_id ON sales(created_at, id);
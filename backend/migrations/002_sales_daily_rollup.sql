@@ -0,0 +1,26 @@
+-- Pre-aggregated sales per day, branch, device and invoice type
+CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+    day                 DATE NOT NULL,
+    branch_id           INTEGER NOT NULL REFERENCES branches(id),
+    device_id           INTEGER NOT NULL REFERENCES devices(id),
+    invoice_type        VARCHAR(20) NOT NULL,
+    sale_count          INTEGER NOT NULL DEFAULT 0,
+    total_qty           NUMERIC(14,2) NOT NULL DEFAULT 0,
+    total_sales_value   NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_tax           NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_discount      NUMERIC(16,2) NOT NULL DEFAULT 0,
+    total_amount        NUMERIC(16,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, branch_id, device_id, invoice_type)
+);
+
+-- Backfill from existing sales
+DELETE FROM sales_daily_rollup;
+INSERT INTO sales_daily_rollup (
+    day, branch_id, device_id, invoice_type, sale_count, total_qty,
+    total_sales_value, total_tax, total_discount, total_amount
+)
+SELECT
+    CAST(invoice_date AS DATE), branch_id, device_id, invoice_type, COUNT(id), SUM(total_qty),
+    SUM(total_sales_value), SUM(total_tax), COALESCE(SUM(total_discount), 0), SUM(total_amount)
+FROM sales
+GROUP BY CAST(invoice_date AS DATE), branch_id, device_id, invoice_type;
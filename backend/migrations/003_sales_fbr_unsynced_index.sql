@@ -0,0 +1,2 @@
+-- Queue of invoices the FBR sync worker still has to deliver
+CREATE INDEX IF NOT EXISTS idx_sales_fbr_unsynced ON sales(id) WHERE fbr_status <> 'SUCCESS';
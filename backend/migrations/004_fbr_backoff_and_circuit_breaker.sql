@@ -0,0 +1,14 @@
+-- Retry schedule for FBR submissions
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE;
+
+-- Circuit breaker shared by all FBR sync workers
+CREATE TABLE IF NOT EXISTS fbr_circuit_breaker (
+    id                 INTEGER PRIMARY KEY,
+    state              VARCHAR(10) NOT NULL DEFAULT 'CLOSED',
+    window_started_at  TIMESTAMP WITH TIME ZONE,
+    window_requests    INTEGER NOT NULL DEFAULT 0,
+    window_failures    INTEGER NOT NULL DEFAULT 0,
+    opened_at          TIMESTAMP WITH TIME ZONE,
+    last_error         TEXT,
+    updated_at         TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,23 @@
+-- Catalog change feed: a shared change sequence on products, categories and
+-- tax rates, plus tombstones for deleted rows. Adding the columns with a
+-- nextval default backfills existing rows.
+CREATE SEQUENCE IF NOT EXISTS catalog_change_seq;
+
+ALTER TABLE tax_rates ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('catalog_change_seq');
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('catalog_change_seq');
+ALTER TABLE products ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('catalog_change_seq');
+ALTER TABLE products ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+UPDATE products SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_tax_rates_change_seq ON tax_rates (change_seq);
+CREATE INDEX IF NOT EXISTS ix_categories_change_seq ON categories (change_seq);
+CREATE INDEX IF NOT EXISTS ix_products_change_seq ON products (change_seq);
+
+CREATE TABLE IF NOT EXISTS catalog_tombstones (
+    id          SERIAL PRIMARY KEY,
+    entity      VARCHAR(20) NOT NULL,   -- product, category or tax_rate
+    entity_id   INTEGER NOT NULL,
+    change_seq  BIGINT NOT NULL,
+    deleted_at  TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_catalog_tombstones_change_seq ON catalog_tombstones (change_seq);
@@ -0,0 +1,9 @@
+-- Full-text product search over code, name and HS code. The 'simple'
+-- configuration does no stemming, which suits brand names and barcodes.
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', code), 'A') ||
+    setweight(to_tsvector('simple', name), 'B') ||
+    setweight(to_tsvector('simple', coalesce(hs_code, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector);
@@ -0,0 +1,16 @@
+-- Materialized category paths ('/1/5/12/') for subtree queries, backfilled
+-- from parent_id. The C collation makes '/' sort before digits, so a subtree
+-- is one range scan on the index.
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS path VARCHAR(500) COLLATE "C";
+
+WITH RECURSIVE tree AS (
+    SELECT id, '/' || id || '/' AS path FROM categories WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, t.path || c.id || '/' FROM categories c JOIN tree t ON c.parent_id = t.id
+)
+UPDATE categories c SET path = tree.path FROM tree WHERE c.id = tree.id;
+
+CREATE INDEX IF NOT EXISTS ix_categories_path ON categories (path);
+
+-- Products of a subtree are then found through their category index
+CREATE INDEX IF NOT EXISTS idx_products_category_id ON products (category_id);
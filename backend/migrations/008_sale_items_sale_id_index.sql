@@ -0,0 +1,3 @@
+-- Item lookups by sale (eager loading, summary item counts, deletes of sales)
+-- had no index on databases created by SQLAlchemy's create_all
+CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items (sale_id);
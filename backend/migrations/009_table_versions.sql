@@ -0,0 +1,7 @@
+-- Write counter per table, bumped by every ORM flush or bulk statement that
+-- changes the table. List endpoints derive their ETags from it, so an
+-- unchanged list costs one primary-key lookup and a 304.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name  VARCHAR(50) PRIMARY KEY,
+    version     BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,125 @@
+-- Monthly range partitions for sales (by invoice_date), sale_items and
+-- payments (by sale_date, the invoice_date of their sale) and invoice_sync_log
+-- (by attempted_at). A date range in the sales listing then scans only the
+-- months it covers, and an old month can be detached from all four tables.
+--
+-- Primary keys of partitioned tables must include the partition key, so:
+--   * the keys become (id, <partition key>); ids still come from the old sequences
+--   * items and payments reference sales by (sale_id, sale_date)
+--   * USINs stay unique through the sale_usins table and its trigger
+--   * fbr_invoice_no is no longer unique across months (FBR issues unique numbers)
+--   * invoice_sync_log no longer references sales
+-- Later months are created by partitions.ensure_partitions (API startup and
+-- manage_partitions.py ensure). Databases created by SQLAlchemy's create_all
+-- already have partitioned tables and only get the USIN trigger.
+
+CREATE TABLE IF NOT EXISTS sale_usins (
+    usin     VARCHAR(50) PRIMARY KEY,
+    sale_id  INTEGER NOT NULL
+);
+
+DO $$
+DECLARE
+    tables TEXT[] := ARRAY['sales', 'sale_items', 'payments', 'invoice_sync_log'];
+    sequences TEXT[];
+    tbl TEXT;
+    month DATE;
+    last_month DATE := date_trunc('month', NOW())::date + INTERVAL '3 months';
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sales'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- The id sequences outlive the tables they were created with
+    sequences := ARRAY(SELECT pg_get_serial_sequence(t, 'id') FROM unnest(tables) WITH ORDINALITY AS u(t, n) ORDER BY n);
+    FOR i IN 1..4 LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', sequences[i]);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', tables[i], tables[i] || '_unpartitioned');
+    END LOOP;
+
+    CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (invoice_date);
+    CREATE TABLE sale_items (LIKE sale_items_unpartitioned INCLUDING DEFAULTS, sale_date TIMESTAMP WITH TIME ZONE NOT NULL)
+        PARTITION BY RANGE (sale_date);
+    CREATE TABLE payments (LIKE payments_unpartitioned INCLUDING DEFAULTS, sale_date TIMESTAMP WITH TIME ZONE NOT NULL)
+        PARTITION BY RANGE (sale_date);
+    CREATE TABLE invoice_sync_log (LIKE invoice_sync_log_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (attempted_at);
+
+    -- One partition per month from the oldest row through three months ahead
+    FOREACH tbl IN ARRAY tables LOOP
+        IF tbl = 'invoice_sync_log' THEN
+            SELECT date_trunc('month', LEAST(MIN(attempted_at), NOW()))::date INTO month FROM invoice_sync_log_unpartitioned;
+        ELSE
+            SELECT date_trunc('month', LEAST(MIN(invoice_date), NOW()))::date INTO month FROM sales_unpartitioned;
+        END IF;
+        WHILE month <= last_month LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                tbl || '_' || to_char(month, 'YYYY_MM'), tbl, month, (month + INTERVAL '1 month')::date
+            );
+            month := month + INTERVAL '1 month';
+        END LOOP;
+    END LOOP;
+
+    INSERT INTO sales SELECT * FROM sales_unpartitioned;
+    INSERT INTO sale_items SELECT i.*, s.invoice_date FROM sale_items_unpartitioned i JOIN sales_unpartitioned s ON s.id = i.sale_id;
+    INSERT INTO payments SELECT p.*, s.invoice_date FROM payments_unpartitioned p JOIN sales_unpartitioned s ON s.id = p.sale_id;
+    INSERT INTO invoice_sync_log SELECT * FROM invoice_sync_log_unpartitioned;
+    INSERT INTO sale_usins (usin, sale_id) SELECT usin, id FROM sales;
+
+    DROP TABLE invoice_sync_log_unpartitioned, payments_unpartitioned, sale_items_unpartitioned, sales_unpartitioned;
+
+    FOR i IN 1..4 LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', sequences[i], tables[i]);
+    END LOOP;
+
+    ALTER TABLE sales ADD PRIMARY KEY (id, invoice_date);
+    ALTER TABLE sales ADD FOREIGN KEY (branch_id) REFERENCES branches(id);
+    ALTER TABLE sales ADD FOREIGN KEY (device_id) REFERENCES devices(id);
+    ALTER TABLE sales ADD FOREIGN KEY (customer_id) REFERENCES customers(id);
+    CREATE INDEX idx_sales_branch_id ON sales (branch_id);
+    CREATE INDEX idx_sales_device_id ON sales (device_id);
+    CREATE INDEX idx_sales_created_at_id ON sales (created_at, id);
+    CREATE INDEX idx_sales_fbr_unsynced ON sales (id) WHERE fbr_status <> 'SUCCESS';
+    CREATE INDEX idx_sales_invoice_date ON sales (invoice_date);
+    CREATE INDEX idx_sales_invoice_no ON sales (invoice_no);
+    CREATE INDEX idx_sales_usin ON sales (usin);
+    CREATE INDEX idx_sales_fbr_invoice_no ON sales (fbr_invoice_no);
+
+    ALTER TABLE sale_items ADD PRIMARY KEY (id, sale_date);
+    ALTER TABLE sale_items ADD FOREIGN KEY (sale_id, sale_date) REFERENCES sales (id, invoice_date) ON DELETE CASCADE;
+    ALTER TABLE sale_items ADD FOREIGN KEY (product_id) REFERENCES products(id);
+    CREATE INDEX idx_sale_items_sale_id ON sale_items (sale_id);
+    CREATE INDEX idx_sale_items_product_id ON sale_items (product_id);
+
+    ALTER TABLE payments ADD PRIMARY KEY (id, sale_date);
+    ALTER TABLE payments ADD FOREIGN KEY (sale_id, sale_date) REFERENCES sales (id, invoice_date) ON DELETE CASCADE;
+    CREATE INDEX idx_payments_sale_id ON payments (sale_id);
+
+    ALTER TABLE invoice_sync_log ADD PRIMARY KEY (id, attempted_at);
+    CREATE INDEX idx_invoice_sync_log_sale_id ON invoice_sync_log (sale_id);
+
+    -- Autovacuum analyzes the partitions but never a partitioned parent
+    ANALYZE sales, sale_items, payments, invoice_sync_log;
+END
+$$;
+
+INSERT INTO sale_usins (usin, sale_id) SELECT usin, id FROM sales ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION reserve_sale_usin() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM sale_usins WHERE usin = OLD.usin;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO sale_usins (usin, sale_id) VALUES (NEW.usin, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sales_usin_unique ON sales;
+CREATE TRIGGER sales_usin_unique
+    AFTER INSERT OR DELETE OR UPDATE OF usin ON sales
+    FOR EACH ROW EXECUTE FUNCTION reserve_sale_usin();
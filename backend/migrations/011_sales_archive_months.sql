@@ -0,0 +1,15 @@
+-- Months of sales, items and payments moved to Parquet files by
+-- archive_sales.py, with the id range GET /api/sales/{id} uses to find the
+-- file of an archived sale.
+CREATE TABLE IF NOT EXISTS sales_archive_months (
+    month          DATE PRIMARY KEY,
+    min_sale_id    INTEGER NOT NULL,
+    max_sale_id    INTEGER NOT NULL,
+    sale_count     INTEGER NOT NULL,
+    item_count     INTEGER NOT NULL,
+    payment_count  INTEGER NOT NULL,
+    path           VARCHAR(500) NOT NULL,
+    archived_at    TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_archive_months_sale_ids ON sales_archive_months (min_sale_id, max_sale_id);
@@ -0,0 +1,16 @@
+-- Trigram indexes for the substring fallback of product search: when the
+-- prefix full-text search finds nothing, code, name and HS code are matched
+-- with ILIKE '%term%' ('pak' finds 'Milkpak'). pg_trgm is a contrib extension;
+-- without it the fallback scans products.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_products_code_trgm ON products USING GIN (code gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_hs_code_trgm ON products USING GIN (hs_code gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available; product substring search scans the table';
+    END IF;
+END
+$$;
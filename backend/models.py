@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Enum, Numeric, JSON
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, ForeignKeyConstraint, Text, Boolean, Enum, Numeric, JSON, Index, Sequence, Computed
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from database import Base
 import enum
 
@@ -50,16 +50,23 @@ class Device(Base):
     branch = relationship("Branch", back_populates="devices")
     sales = relationship("Sale", back_populates="device")
 
+# Catalog change feed: every write to products, categories or tax rates stamps
+# the rows with the next value of this sequence (see catalog_changes.py)
+catalog_change_seq = Sequence("catalog_change_seq", metadata=Base.metadata)
+
 class Category(Base):
     __tablename__ = "categories"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    # Materialized path of ids from the root, e.g. '/1/5/12/' (see category_tree.py)
+    path = Column(String(500, collation="C"), nullable=True, index=True)
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=catalog_change_seq.next_value())
     
     # Self-referential relationship
-    parent = relationship("Category", remote_side=[id])
-    children = relationship("Category")
+    parent = relationship("Category", remote_side=[id], back_populates="children")
+    children = relationship("Category", back_populates="parent")
     products = relationship("Product", back_populates="category")
 
 class TaxRate(Base):
@@ -69,6 +76,7 @@ class TaxRate(Base):
     name = Column(String(100), nullable=False)
     rate = Column(Numeric(5, 2), nullable=False)
     code = Column(String(20))  # FBR SRO Schedule code
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=catalog_change_seq.next_value())
     
     # Relationships
     products = relationship("Product", back_populates="tax_rate")
@@ -84,6 +92,20 @@ class Product(Base):
     tax_id = Column(Integer, ForeignKey("tax_rates.id"), nullable=True)
     hs_code = Column(String(20))  # FBR Harmonized System Code
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=False, index=True, server_default=catalog_change_seq.next_value())
+    # Full-text search over code, name and HS code (see product_search.py)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', code), 'A') || "
+        "setweight(to_tsvector('simple', name), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(hs_code, '')), 'C')",
+        persisted=True
+    )))
+    
+    __table_args__ = (
+        Index("idx_products_category_id", "category_id"),
+        Index("idx_products_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     # Relationships
     category = relationship("Category", back_populates="products")
@@ -103,15 +125,18 @@ class Customer(Base):
     # Relationships
     sales = relationship("Sale", back_populates="customer")
 
+# sales, sale_items and payments are partitioned by month of the sale's
+# invoice_date, invoice_sync_log by month of attempted_at (see partitions.py).
+# Their primary keys, and so their ORM identities, include the partition key.
 class Sale(Base):
     __tablename__ = "sales"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     invoice_no = Column(String(30), nullable=False)
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
     device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
-    invoice_date = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    invoice_date = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     invoice_type = Column(Enum(InvoiceTypeEnum), nullable=False)
     sale_type_code = Column(String(20), nullable=False)  # e.g. 'T1000017'
     seller_ntn = Column(String(7), nullable=False)
@@ -123,14 +148,15 @@ class Sale(Base):
     total_tax = Column(Numeric(14, 2), nullable=False)
     total_discount = Column(Numeric(14, 2), default=0)
     total_amount = Column(Numeric(14, 2), nullable=False)
-    usin = Column(String(50), unique=True, nullable=False)  # Unique Sale Invoice Number
-    fbr_invoice_no = Column(String(50), unique=True, nullable=True)
+    usin = Column(String(50), nullable=False)  # Unique Sale Invoice Number, kept unique by sale_usins
+    fbr_invoice_no = Column(String(50), nullable=True)
     qr_payload = Column(Text, nullable=True)
     fbr_payload = Column(JSONB, nullable=True)
     fbr_response = Column(JSONB, nullable=True)
     fbr_status = Column(Enum(FBRStatusEnum), nullable=False, default=FBRStatusEnum.PENDING)
     sync_attempts = Column(Integer, nullable=False, default=0)
     last_synced_at = Column(DateTime(timezone=True), nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # FBR retry backoff schedule
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -139,12 +165,37 @@ class Sale(Base):
     customer = relationship("Customer", back_populates="sales")
     items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="sale", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("idx_sales_branch_id", "branch_id"),
+        Index("idx_sales_device_id", "device_id"),
+        # Keyset pagination order for sales listings
+        Index("idx_sales_created_at_id", "created_at", "id"),
+        # Queue of invoices the FBR sync worker still has to deliver
+        Index("idx_sales_fbr_unsynced", "id", postgresql_where=text("fbr_status <> 'SUCCESS'")),
+        Index("idx_sales_invoice_date", "invoice_date"),
+        Index("idx_sales_invoice_no", "invoice_no"),
+        Index("idx_sales_usin", "usin"),
+        Index("idx_sales_fbr_invoice_no", "fbr_invoice_no"),
+        {"postgresql_partition_by": "RANGE (invoice_date)"},
+    )
+    # invoice_date and created_at come back from the INSERT, so items and payments get their sale_date
+    __mapper_args__ = {"eager_defaults": True}
+
+# Every USIN in sales. A unique index on the partitioned table would have to
+# include invoice_date, so the sales_usin_unique trigger keeps USINs unique here.
+class SaleUsin(Base):
+    __tablename__ = "sale_usins"
+    
+    usin = Column(String(50), primary_key=True)
+    sale_id = Column(Integer, nullable=False)
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
     
-    id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sale_id = Column(Integer, nullable=False)
+    sale_date = Column(DateTime(timezone=True), primary_key=True)  # invoice_date of the sale
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     hs_code = Column(String(20), nullable=True)
     quantity = Column(Numeric(10, 2), nullable=False)
@@ -163,12 +214,21 @@ class SaleItem(Base):
     # Relationships
     sale = relationship("Sale", back_populates="items")
     product = relationship("Product", back_populates="sale_items")
+    
+    __table_args__ = (
+        # Items of a sale: eager loading, item counts and cascades
+        Index("idx_sale_items_sale_id", "sale_id"),
+        Index("idx_sale_items_product_id", "product_id"),
+        ForeignKeyConstraint(["sale_id", "sale_date"], ["sales.id", "sales.invoice_date"], ondelete="CASCADE"),
+        {"postgresql_partition_by": "RANGE (sale_date)"},
+    )
 
 class Payment(Base):
     __tablename__ = "payments"
     
-    id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sale_id = Column(Integer, nullable=False)
+    sale_date = Column(DateTime(timezone=True), primary_key=True)  # invoice_date of the sale
     method = Column(String(30), nullable=False)  # e.g., 'Cash', 'Card'
     amount = Column(Numeric(14, 2), nullable=False)
     payment_date = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -176,17 +236,93 @@ class Payment(Base):
     
     # Relationships
     sale = relationship("Sale", back_populates="payments")
+    
+    __table_args__ = (
+        Index("idx_payments_sale_id", "sale_id"),
+        ForeignKeyConstraint(["sale_id", "sale_date"], ["sales.id", "sales.invoice_date"], ondelete="CASCADE"),
+        {"postgresql_partition_by": "RANGE (sale_date)"},
+    )
 
 class InvoiceSyncLog(Base):
     __tablename__ = "invoice_sync_log"
     
-    id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # No foreign key: log months are detached independently of sales months
+    sale_id = Column(Integer, nullable=False)
     attempt_no = Column(Integer, nullable=False)
     payload = Column(JSONB, nullable=True)
     response = Column(JSONB, nullable=True)
     status = Column(Enum(FBRStatusEnum), nullable=False)
-    attempted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now()) 
+    attempted_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_invoice_sync_log_sale_id", "sale_id"),
+        {"postgresql_partition_by": "RANGE (attempted_at)"},
+    )
+
+# Shared state of the FBR submission circuit breaker (a single row, id = 1)
+class FBRCircuitBreaker(Base):
+    __tablename__ = "fbr_circuit_breaker"
+    
+    id = Column(Integer, primary_key=True)
+    state = Column(String(10), nullable=False, default="CLOSED")  # CLOSED, OPEN or HALF_OPEN
+    window_started_at = Column(DateTime(timezone=True), nullable=True)
+    window_requests = Column(Integer, nullable=False, default=0)
+    window_failures = Column(Integer, nullable=False, default=0)
+    opened_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Pre-aggregated sales per day, branch, device and invoice type.
+# Updated in the same transaction as create_sale (see rollups.py)
+class SalesDailyRollup(Base):
+    __tablename__ = "sales_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), primary_key=True)
+    device_id = Column(Integer, ForeignKey("devices.id"), primary_key=True)
+    invoice_type = Column(Enum(InvoiceTypeEnum, native_enum=False, length=20), primary_key=True)
+    sale_count = Column(Integer, nullable=False, default=0)
+    total_qty = Column(Numeric(14, 2), nullable=False, default=0)
+    total_sales_value = Column(Numeric(16, 2), nullable=False, default=0)
+    total_tax = Column(Numeric(16, 2), nullable=False, default=0)
+    total_discount = Column(Numeric(16, 2), nullable=False, default=0)
+    total_amount = Column(Numeric(16, 2), nullable=False, default=0)
+
+# Deleted catalog rows, so the change feed can tell terminals to drop them
+class CatalogTombstone(Base):
+    __tablename__ = "catalog_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)  # product, category or tax_rate
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Write counter per table, the basis of the ETags on catalog-style list endpoints
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# Months of sales, items and payments moved to Parquet files (see sales_archive.py).
+# The id range finds the month of an archived sale without opening every file.
+class SalesArchiveMonth(Base):
+    __tablename__ = "sales_archive_months"
+    
+    month = Column(Date, primary_key=True)
+    min_sale_id = Column(Integer, nullable=False)
+    max_sale_id = Column(Integer, nullable=False)
+    sale_count = Column(Integer, nullable=False)
+    item_count = Column(Integer, nullable=False)
+    payment_count = Column(Integer, nullable=False)
+    path = Column(String(500), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("idx_sales_archive_months_sale_ids", "min_sale_id", "max_sale_id"),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -200,4 +336,13 @@ class User(Base):
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    branch = relationship("Branch") 
\ No newline at end of file
+    branch = relationship("Branch") 
+
+# Listeners that keep derived catalog columns (change_seq, categories.path) and
+# table versions in sync, and the DDL that create_all needs for partitioned sales
+# and the product search indexes
+import catalog_changes  # noqa: E402,F401
+import category_tree  # noqa: E402,F401
+import table_versions  # noqa: E402,F401
+import partitions  # noqa: E402,F401
+import product_search  # noqa: E402,F401
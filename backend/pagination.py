@@ -0,0 +1,31 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+# Opaque cursors for keyset pagination. A cursor is the sort key of the last
+# row of a page, so the next page is a range scan on the index instead of an
+# OFFSET that re-reads every skipped row.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page"""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor into a sort key, converting each value to the given type"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        if not isinstance(key, list) or len(key) != len(types):
+            raise ValueError("Cursor has the wrong shape")
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value_type, value in zip(types, key)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
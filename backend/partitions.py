@@ -0,0 +1,118 @@
+import os
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import DDL, event, text
+from sqlalchemy.engine import Connection
+from models import Sale as SaleModel
+
+# Partitioned table -> partition key. Items and payments are partitioned by the
+# invoice_date of their sale (sale_date), so a month of sales is one partition
+# in each table and can be detached as a unit.
+PARTITIONED_TABLES = {
+    "sales": "invoice_date",
+    "sale_items": "sale_date",
+    "payments": "sale_date",
+    "invoice_sync_log": "attempted_at",
+}
+# Tables whose partitions reference a sales partition; detached before it
+SALE_CHILD_TABLES = ["sale_items", "payments"]
+# Months created ahead of the current one; checkouts fail outside every partition
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Seconds between the API's own runs of ensure_partitions, so a process that
+# runs for months keeps creating partitions without a restart or cron
+PARTITION_CHECK_INTERVAL = float(os.getenv("PARTITION_CHECK_INTERVAL", "21600"))
+# Creating or detaching a partition locks its parent; give up rather than queue checkouts behind it
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+
+# USINs must be unique across months, which no index on sales can enforce
+SALE_USIN_TRIGGER = """
+CREATE OR REPLACE FUNCTION reserve_sale_usin() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM sale_usins WHERE usin = OLD.usin;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO sale_usins (usin, sale_id) VALUES (NEW.usin, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sales_usin_unique
+    AFTER INSERT OR DELETE OR UPDATE OF usin ON sales
+    FOR EACH ROW EXECUTE FUNCTION reserve_sale_usin();
+"""
+event.listen(SaleModel.__table__, "after_create", DDL(SALE_USIN_TRIGGER))
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+def list_partitions(conn: Connection, table: str) -> Dict[str, str]:
+    """Attached partitions of table by name, with their bounds"""
+    return dict(conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY c.relname
+    """), {"table": table}).all())
+
+def _lock_partitioned_tables(conn: Connection):
+    # One partition manager at a time, e.g. several API processes starting together
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('partitions'))"))
+    conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+
+def ensure_partitions(conn: Connection, start: Optional[date] = None,
+                      months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create the missing monthly partitions from start (default: this month)
+    through months_ahead months from now, in the caller's transaction.
+
+    Month bounds are midnight in the session time zone, like the rollup days.
+    """
+    _lock_partitioned_tables(conn)
+    first = month_start(start or date.today())
+    last = add_months(month_start(date.today()), months_ahead)
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = list_partitions(conn, table)
+        month = first
+        while month <= last:
+            name = partition_name(table, month)
+            if name not in existing:
+                conn.execute(text(
+                    f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+def detach_month(conn: Connection, month: date, tables: Optional[List[str]] = None) -> List[str]:
+    """Detach one month from tables (default: every partitioned table), in the caller's transaction.
+
+    The detached tables keep their rows and can be dumped, archived or dropped.
+    Foreign keys from detached items and payments to sales are dropped, since
+    the sales month they point to is detached too.
+    """
+    _lock_partitioned_tables(conn)
+    month = month_start(month)
+    detached = []
+    for table in SALE_CHILD_TABLES + ["sales", "invoice_sync_log"]:
+        name = partition_name(table, month)
+        if (tables is not None and table not in tables) or name not in list_partitions(conn, table):
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        if table in SALE_CHILD_TABLES:
+            for constraint in conn.execute(text("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = CAST(:name AS regclass) AND confrelid = CAST('sales' AS regclass)
+            """), {"name": name}).scalars().all():
+                conn.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+        detached.append(name)
+    return detached
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkouts kept for the wait-time percentiles
+WAIT_SAMPLE_SIZE = 1000
+
+class PoolMetrics:
+    """Counters for connection checkouts, waits and churn of one pool"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.peak_checked_out = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def record_checkout(self, wait: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.recent_waits.append(wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        with self._lock:
+            waits = sorted(self.recent_waits)
+            checked_out = pool.checkedout()
+            capacity = pool.size() + max(pool._max_overflow, 0)
+
+            def percentile(p):
+                return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 3) if waits else 0.0
+
+            return {
+                "pool": {
+                    "size": pool.size(),
+                    "max_overflow": pool._max_overflow,
+                    "timeout": pool._timeout,
+                    "recycle": pool._recycle,
+                    "pre_ping": pool._pre_ping,
+                },
+                "checked_out": checked_out,
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "saturation": round(checked_out / capacity, 3) if capacity else None,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "mean": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": percentile(0.5),
+                    "p95": percentile(0.95),
+                    "p99": percentile(0.99),
+                    "max": round(self.max_wait * 1000, 3),
+                },
+                "connections_opened": self.connects,
+                "connections_closed": self.closes,
+                "connections_invalidated": self.invalidations,
+            }
+
+class PoolInstrumentation:
+    """Pool mixin that times how long each checkout waits for a connection.
+
+    The wait includes opening a new connection when the pool grows.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        metrics = self.metrics = PoolMetrics()
+        # A recreated pool inherits these listeners through _dispatch
+        if "_dispatch" not in kwargs:
+            event.listen(self, "connect", lambda *args: metrics.count("connects"))
+            event.listen(self, "close", lambda *args: metrics.count("closes"))
+            event.listen(self, "close_detached", lambda *args: metrics.count("closes"))
+            event.listen(self, "invalidate", lambda *args: metrics.count("invalidations"))
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedQueuePool(PoolInstrumentation, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(PoolInstrumentation, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from catalog_changes import current_change_seq, repeatable_read
+from models import Product as ProductModel, CatalogTombstone as CatalogTombstoneModel
+
+# Seconds between pulls from the catalog change feed, which picks up product
+# writes made by other API processes or by bulk operations
+AUTOCOMPLETE_REFRESH_INTERVAL = float(os.getenv("AUTOCOMPLETE_REFRESH_INTERVAL", "5"))
+# Candidates checked per lookup; bounds latency when several common words
+# are typed that rarely occur together
+AUTOCOMPLETE_MAX_SCAN = int(os.getenv("AUTOCOMPLETE_MAX_SCAN", "2000"))
+
+def _tokens(code: str, name: str) -> Tuple[str, ...]:
+    """Lowercase name words plus the code, each indexed as a prefix key"""
+    tokens = dict.fromkeys(sys.intern(word) for word in name.lower().split())
+    tokens[code.lower()] = None
+    return tuple(tokens)
+
+def _joined(tokens: Tuple[str, ...]) -> str:
+    """' word word code' so that ' ' + prefix in joined tests every token at once"""
+    return " " + " ".join(tokens)
+
+class ProductAutocomplete:
+    """Sorted (token, product_id) array answering prefix queries with bisect"""
+    def __init__(self, refresh_interval: float = AUTOCOMPLETE_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.entries: List[Tuple[str, int]] = []
+        # product_id -> (code, name, price, joined tokens, tokens); the tokens
+        # are kept as indexed, since a code may contain spaces
+        self.products: Dict[int, Tuple[str, str, object, str, Tuple[str, ...]]] = {}
+        self.change_seq: Optional[int] = None
+        self.refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _remove(self, product_id: int):
+        product = self.products.pop(product_id, None)
+        if product is None:
+            return
+        for token in product[4]:
+            index = bisect_left(self.entries, (token, product_id))
+            if index < len(self.entries) and self.entries[index] == (token, product_id):
+                del self.entries[index]
+
+    def _add(self, product_id: int, code: str, name: str, price):
+        tokens = _tokens(code, name)
+        self.products[product_id] = (code, name, price, _joined(tokens), tokens)
+        for token in tokens:
+            insort(self.entries, (token, product_id))
+
+    def upsert(self, product_id: int, code: str, name: str, price):
+        with self._lock:
+            self._remove(product_id)
+            self._add(product_id, code, name, price)
+
+    def remove(self, product_id: int):
+        with self._lock:
+            self._remove(product_id)
+
+    def mark_stale(self):
+        """Pull the change feed on the next lookup, e.g. after a bulk write"""
+        self.refreshed_at = 0.0
+
+    def _load(self, db: Session):
+        repeatable_read(db)
+        change_seq = current_change_seq(db)
+        rows = db.query(ProductModel.id, ProductModel.code, ProductModel.name, ProductModel.price).all()
+        db.rollback()
+
+        products, entries = {}, []
+        for product_id, code, name, price in rows:
+            tokens = _tokens(code, name)
+            products[product_id] = (code, name, price, _joined(tokens), tokens)
+            entries.extend((token, product_id) for token in tokens)
+        entries.sort()
+        with self._lock:
+            self.products, self.entries, self.change_seq = products, entries, change_seq
+
+    def _apply_changes(self, db: Session):
+        repeatable_read(db)
+        changed = db.query(
+            ProductModel.id, ProductModel.code, ProductModel.name, ProductModel.price, ProductModel.change_seq
+        ).filter(ProductModel.change_seq > self.change_seq).all()
+        deleted = db.query(CatalogTombstoneModel.entity_id, CatalogTombstoneModel.change_seq).filter(
+            CatalogTombstoneModel.entity == "product",
+            CatalogTombstoneModel.change_seq > self.change_seq
+        ).all()
+        db.rollback()
+
+        with self._lock:
+            for product_id, code, name, price, _ in changed:
+                self._remove(product_id)
+                self._add(product_id, code, name, price)
+            for product_id, _ in deleted:
+                self._remove(product_id)
+            self.change_seq = max([self.change_seq] + [row[-1] for row in changed + deleted])
+
+    def ensure_fresh(self, db: Session):
+        """Build on first use, then apply the change feed at most once per refresh interval"""
+        if self.change_seq is not None and time.monotonic() - self.refreshed_at < self.refresh_interval:
+            return
+        # Only one thread refreshes; the rest keep answering from the current index
+        if not self._refresh_lock.acquire(blocking=self.change_seq is None):
+            return
+        try:
+            if self.change_seq is None:
+                self._load(db)
+            elif time.monotonic() - self.refreshed_at >= self.refresh_interval:
+                self._apply_changes(db)
+            self.refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def _range(self, word: str) -> Tuple[int, int]:
+        return bisect_left(self.entries, (word,)), bisect_left(self.entries, (word + "\U0010ffff",))
+
+    def lookup(self, q: str, limit: int = 10) -> List[dict]:
+        """Products whose code or name words start with every word of q"""
+        words = q.lower().split()
+        if not words:
+            return []
+        with self._lock:
+            # Walk the narrowest prefix range and check the other words per product
+            ranges = [(self._range(word), word) for word in words]
+            (start, end), anchor = min(ranges, key=lambda item: item[0][1] - item[0][0])
+            others = [" " + word for word in words if word != anchor]
+
+            results, seen = [], set()
+            for index in range(start, min(end, start + AUTOCOMPLETE_MAX_SCAN)):
+                product_id = self.entries[index][1]
+                if product_id in seen:
+                    continue
+                seen.add(product_id)
+                code, name, price, joined, _ = self.products[product_id]
+                if all(word in joined for word in others):
+                    results.append({"id": product_id, "code": code, "name": name, "price": price})
+                    if len(results) == limit:
+                        break
+        return results
+
+product_autocomplete = ProductAutocomplete()
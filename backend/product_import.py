@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, List, Optional, Set, TextIO, Tuple
+from sqlalchemy import Column, Integer, MetaData, Numeric, String, Table, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from catalog_changes import next_change_seq
+from table_versions import bump_table_versions
+from models import Product as ProductModel, Category as CategoryModel, TaxRate as TaxRateModel
+
+REQUIRED_COLUMNS = ["code", "name", "price"]
+OPTIONAL_COLUMNS = ["category_id", "tax_id", "hs_code"]
+MAX_LENGTHS = {"code": 50, "name": 150, "hs_code": 20}
+# Product prices are NUMERIC(12, 2)
+CENT = Decimal("0.01")
+COPY_CHUNK_ROWS = 10000
+MAX_REPORTED_ERRORS = 1000
+
+# Per-transaction staging table that validated rows are COPYed into
+staging = Table(
+    "product_import_staging", MetaData(),
+    Column("line_no", Integer),
+    # Optional columns the record has, comma-separated; the others keep their values
+    Column("optional_columns", String(50)),
+    Column("code", String(50)),
+    Column("name", String(150)),
+    Column("price", Numeric(12, 2)),
+    Column("category_id", Integer),
+    Column("tax_id", Integer),
+    Column("hs_code", String(20)),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP"
+)
+
+def _json_object(line: str) -> Optional[dict]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+def read_records(stream: TextIO, fmt: str) -> Tuple[Optional[List[str]], Iterator[Tuple[int, Optional[dict]]]]:
+    """Return the CSV header (None for NDJSON, whose records each have their own keys)
+    and an iterator of (line number, record)"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        return reader.fieldnames, ((reader.line_num, record) for record in reader)
+    return None, ((line_no, _json_object(line)) for line_no, line in enumerate(stream, start=1) if line.strip())
+
+def _optional_int(value, field: str, known_ids: Set[int]) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an integer")
+    if value not in known_ids:
+        raise ValueError(f"{field} {value} does not exist")
+    return value
+
+def parse_record(record: Optional[dict], category_ids: Set[int], tax_ids: Set[int]) -> tuple:
+    """Validate one record and return its staging values, or raise ValueError"""
+    if record is None:
+        raise ValueError("Not a JSON object")
+    missing = [field for field in REQUIRED_COLUMNS if field not in record]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+
+    values = {}
+    for field in ["code", "name", "hs_code"]:
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ""
+        if len(value) > MAX_LENGTHS[field]:
+            raise ValueError(f"{field} is longer than {MAX_LENGTHS[field]} characters")
+        values[field] = value or None
+    if not values["code"]:
+        raise ValueError("code is required")
+    if not values["name"]:
+        raise ValueError("name is required")
+
+    try:
+        price = Decimal(str(record.get("price")).strip())
+    except InvalidOperation:
+        raise ValueError("price must be a number")
+    if not price.is_finite() or price < 0 or price >= Decimal("1e10") or price != price.quantize(CENT):
+        raise ValueError("price must be a non-negative amount with at most 2 decimals")
+    # Trailing zeros such as "12.500" from spreadsheet exports are fine
+    price = price.quantize(CENT)
+
+    return (
+        values["code"],
+        values["name"],
+        price,
+        _optional_int(record.get("category_id"), "category_id", category_ids),
+        _optional_int(record.get("tax_id"), "tax_id", tax_ids),
+        values["hs_code"]
+    )
+
+def _copy_rows(cursor, rows: List[tuple]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {staging.name} ({', '.join(column.name for column in staging.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def _upsert(latest, update_columns: List[str], change_seq: int):
+    """INSERT ... ON CONFLICT (code) of the latest staging rows having update_columns"""
+    insert_columns = ["code"] + update_columns
+    rows = select(*[latest.c[column] for column in insert_columns], literal(change_seq)).where(
+        latest.c.optional_columns.is_not_distinct_from(",".join(update_columns[2:]) or None)
+    )
+    stmt = pg_insert(ProductModel).from_select(insert_columns + ["change_seq"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["code"],
+        set_={
+            **{column: stmt.excluded[column] for column in update_columns},
+            "change_seq": stmt.excluded.change_seq,
+            "updated_at": func.now()
+        },
+        # Rows that would not change keep their change_seq
+        where=tuple_(*[ProductModel.__table__.c[column] for column in update_columns]).is_distinct_from(
+            tuple_(*[stmt.excluded[column] for column in update_columns])
+        )
+    ).returning(literal_column("xmax = 0"))
+
+def import_products(db: Session, stream: TextIO, fmt: str = "csv") -> dict:
+    """Validate, COPY and upsert products by code in the caller's transaction.
+
+    Optional columns missing from the CSV header, or from an NDJSON record, keep
+    their current values on existing products. Invalid rows are skipped and
+    reported; if a code appears more than once the last row wins.
+    """
+    columns, records = read_records(stream, fmt)
+    if columns is not None:
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        file_columns = ",".join(column for column in OPTIONAL_COLUMNS if column in columns) or None
+
+    category_ids = {category_id for (category_id,) in db.query(CategoryModel.id)}
+    tax_ids = {tax_id for (tax_id,) in db.query(TaxRateModel.id)}
+
+    staging.create(db.connection())
+    cursor = db.connection().connection.cursor()
+    total, failed, errors, chunk = 0, 0, [], []
+    for line_no, record in records:
+        total += 1
+        try:
+            values = parse_record(record, category_ids, tax_ids)
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                code = (record or {}).get("code")
+                errors.append({"line": line_no, "code": str(code) if code is not None else None, "error": str(e)})
+            continue
+        optional_columns = file_columns if columns is not None else ",".join(
+            column for column in OPTIONAL_COLUMNS if column in record
+        ) or None
+        chunk.append((line_no, optional_columns) + values)
+        if len(chunk) >= COPY_CHUNK_ROWS:
+            _copy_rows(cursor, chunk)
+            chunk = []
+    if chunk:
+        _copy_rows(cursor, chunk)
+
+    # One upsert per set of optional columns, over the last row of each code
+    change_seq = next_change_seq(db)
+    latest = select(staging).distinct(staging.c.code).order_by(
+        staging.c.code, staging.c.line_no.desc()
+    ).subquery()
+    inserted_flags = []
+    for (optional_columns,) in db.execute(select(latest.c.optional_columns).distinct()).all():
+        update_columns = ["name", "price"] + (optional_columns.split(",") if optional_columns else [])
+        inserted_flags += db.execute(_upsert(latest, update_columns, change_seq)).scalars().all()
+    if inserted_flags:
+        bump_table_versions(db, "products")
+    valid_codes = db.execute(select(func.count(func.distinct(staging.c.code)))).scalar()
+
+    inserted = sum(1 for flag in inserted_flags if flag)
+    return {
+        "rows": total,
+        "inserted": inserted,
+        "updated": len(inserted_flags) - inserted,
+        "unchanged": valid_codes - len(inserted_flags),
+        "failed": failed,
+        "errors": errors
+    }
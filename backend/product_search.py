@@ -0,0 +1,65 @@
+from sqlalchemy import DDL, and_, event, false, func, or_
+from models import Product as ProductModel
+
+# Characters with a meaning in tsquery syntax; stripped from cashier input
+TSQUERY_SPECIAL = str.maketrans("", "", "'\\&|!():*<>")
+
+# Trigram indexes for the substring fallback. pg_trgm is a contrib extension;
+# where it is not installed the fallback scans products instead.
+PRODUCT_TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_products_code_trgm ON products USING GIN (code gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_hs_code_trgm ON products USING GIN (hs_code gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available; product substring search scans the table';
+    END IF;
+END
+$$;
+"""
+
+event.listen(ProductModel.__table__, "after_create", DDL(PRODUCT_TRIGRAM_INDEXES))
+
+def build_search_tsquery(search: str):
+    """Turn typed text into a prefix tsquery: 'nestle mil' matches 'Nestle Milkpak 1L'"""
+    terms = [term.translate(TSQUERY_SPECIAL) for term in search.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"'{term}':*" for term in terms))
+
+def apply_product_search(query, search: str):
+    """Filter a product query by the search index and order it by relevance"""
+    tsquery = build_search_tsquery(search)
+    if tsquery is None:
+        return query.filter(false())
+    return query.filter(ProductModel.search_vector.op("@@")(tsquery)).order_by(
+        (ProductModel.code == search.strip()).desc(),
+        func.ts_rank(ProductModel.search_vector, tsquery).desc(),
+        ProductModel.id
+    )
+
+def apply_substring_search(query, search: str):
+    """Filter by every typed word appearing anywhere in code, name or HS code: 'pak' matches 'Milkpak'"""
+    terms = search.split()
+    if not terms:
+        return query.filter(false())
+    return query.filter(and_(*(
+        or_(
+            ProductModel.code.icontains(term, autoescape=True),
+            ProductModel.name.icontains(term, autoescape=True),
+            ProductModel.hs_code.icontains(term, autoescape=True)
+        )
+        for term in terms
+    ))).order_by((ProductModel.code == search.strip()).desc(), ProductModel.id)
+
+def search_products(query, search: str, skip: int, limit: int) -> list:
+    """Ranked full-text matches, or substring matches when the full-text search finds nothing"""
+    ranked = apply_product_search(query, search)
+    products = ranked.offset(skip).limit(limit).all()
+    if products or (skip and ranked.first() is not None):
+        return products
+    return apply_substring_search(query, search).offset(skip).limit(limit).all()
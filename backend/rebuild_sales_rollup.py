@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Sales Rollup Rebuild Script for FBR Integrated POS System
+This script recomputes sales_daily_rollup from the sales table, e.g. after a
+backfill or a bulk import of historical sales. Months moved to the Parquet
+archive (archive_sales.py) keep their rollup rows, which cannot be rebuilt
+once their sales have left the database.
+
+Usage: python rebuild_sales_rollup.py [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine, SessionLocal
+from models import Base, SalesArchiveMonth
+from rollups import rebuild_rollup
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the daily sales rollup; days of archived months are left as they are"
+    )
+    parser.add_argument("--start", type=date.fromisoformat, help="first day to rebuild (default: all)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day to rebuild (default: all)")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Rebuilding sales rollup from {args.start or 'the first sale'} to {args.end or 'today'}...")
+        archived = [month for (month,) in db.query(SalesArchiveMonth.month).order_by(SalesArchiveMonth.month)]
+        if archived:
+            print(f"Keeping the rollup of archived months {', '.join(f'{month:%Y-%m}' for month in archived)}")
+        deleted = rebuild_rollup(db, args.start, args.end)
+        db.commit()
+        print(f"✅ Sales rollup rebuilt ({deleted} stale rows replaced)")
+    except Exception as e:
+        print(f"❌ Error rebuilding sales rollup: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import Date, cast, exists, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from models import Sale as SaleModel, SalesDailyRollup, SalesArchiveMonth
+
+ROLLUP_KEY_COLUMNS = ["day", "branch_id", "device_id", "invoice_type"]
+ROLLUP_VALUE_COLUMNS = [
+    "sale_count", "total_qty", "total_sales_value", "total_tax", "total_discount", "total_amount"
+]
+
+def _aggregate_sales(*criteria):
+    """SELECT the rollup rows for the sales matching criteria"""
+    day = cast(SaleModel.invoice_date, Date)
+    return select(
+        day,
+        SaleModel.branch_id,
+        SaleModel.device_id,
+        SaleModel.invoice_type,
+        func.count(SaleModel.id),
+        func.sum(SaleModel.total_qty),
+        func.sum(SaleModel.total_sales_value),
+        func.sum(SaleModel.total_tax),
+        func.coalesce(func.sum(SaleModel.total_discount), 0),
+        func.sum(SaleModel.total_amount)
+    ).where(*criteria).group_by(
+        day, SaleModel.branch_id, SaleModel.device_id, SaleModel.invoice_type
+    )
+
+def add_sales_to_rollup(db: Session, *criteria):
+    """Add the sales matching criteria to the rollup in the caller's transaction"""
+    stmt = pg_insert(SalesDailyRollup).from_select(
+        ROLLUP_KEY_COLUMNS + ROLLUP_VALUE_COLUMNS, _aggregate_sales(*criteria)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY_COLUMNS,
+        set_={
+            column: getattr(SalesDailyRollup, column) + getattr(stmt.excluded, column)
+            for column in ROLLUP_VALUE_COLUMNS
+        }
+    )
+    db.execute(stmt)
+
+def rebuild_rollup(db: Session, start: Optional[date] = None, end: Optional[date] = None):
+    """Recompute the rollup for the days in [start, end] from the sales table.
+
+    Days of archived months (sales_archive_months) keep their rows: their sales
+    are no longer in the sales table, so the rollup is all that is left of them.
+    """
+    # Block concurrent checkouts from updating the rollup while it is rebuilt
+    db.execute(text("LOCK TABLE sales_daily_rollup IN SHARE ROW EXCLUSIVE MODE"))
+    
+    delete_query = db.query(SalesDailyRollup).filter(~exists().where(
+        SalesArchiveMonth.month == cast(func.date_trunc("month", SalesDailyRollup.day), Date)
+    ))
+    criteria = []
+    if start:
+        delete_query = delete_query.filter(SalesDailyRollup.day >= start)
+        criteria.append(SaleModel.invoice_date >= start)
+    if end:
+        delete_query = delete_query.filter(SalesDailyRollup.day <= end)
+        criteria.append(SaleModel.invoice_date < end + timedelta(days=1))
+    deleted = delete_query.delete(synchronize_session=False)
+    
+    db.execute(pg_insert(SalesDailyRollup).from_select(
+        ROLLUP_KEY_COLUMNS + ROLLUP_VALUE_COLUMNS, _aggregate_sales(*criteria)
+    ))
+    return deleted
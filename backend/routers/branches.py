@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
+from http_cache import conditional_get
 from models import Branch as BranchModel
 from schemas import Branch, BranchCreate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Branch])
-def get_branches(db: Session = Depends(get_db)):
+def get_branches(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(request, response, db, "branches")
+    if not_modified:
+        return not_modified
     branches = db.query(BranchModel).all()
     return branches
 
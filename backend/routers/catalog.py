@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from decimal import Decimal
+import gzip
+import json
+import threading
+from catalog_cache import snapshot_cache
+from catalog_changes import current_change_seq, repeatable_read
+from database import get_db, SessionLocal
+from compression import BROTLI_STATIC_QUALITY, accepted_encodings, brotli, prefers_brotli
+from http_cache import etag_matches
+from models import (
+    Product as ProductModel, Category as CategoryModel, TaxRate as TaxRateModel,
+    CatalogTombstone as CatalogTombstoneModel
+)
+
+router = APIRouter()
+
+PRODUCT_FIELDS = ["id", "code", "name", "category_id", "price", "tax_id", "hs_code"]
+CATEGORY_FIELDS = ["id", "name", "parent_id"]
+TAX_RATE_FIELDS = ["id", "name", "rate", "code"]
+
+# Referenced tables first, so terminals can apply rows in order
+CATALOG_TABLES = [
+    ("tax_rate", TaxRateModel, TAX_RATE_FIELDS),
+    ("category", CategoryModel, CATEGORY_FIELDS),
+    ("product", ProductModel, PRODUCT_FIELDS),
+]
+
+# Terminals booting together should trigger one rebuild, not one each
+_build_lock = threading.Lock()
+
+class CatalogSnapshot:
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        # Weak: the identity, gzip and brotli bodies share it
+        self.etag = f'W/"{version}"'
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        self.br_body = brotli.compress(body, quality=BROTLI_STATIC_QUALITY) if brotli else None
+
+def _values(row):
+    """Decimals are sent as strings, as in the rest of the API"""
+    return [str(value) if isinstance(value, Decimal) else value for value in row]
+
+def build_snapshot(db: Session) -> CatalogSnapshot:
+    """Serialize the catalog as field lists plus row arrays, versioned by change sequence"""
+    repeatable_read(db)
+    version = current_change_seq(db)
+    document = {"version": version, "generated_at": datetime.now(timezone.utc).isoformat()}
+    for table, (_, model, fields) in zip(["tax_rates", "categories", "products"], CATALOG_TABLES):
+        columns = [getattr(model, field) for field in fields]
+        document[table] = {
+            "fields": fields,
+            "rows": [_values(row) for row in db.query(*columns).order_by(model.id)]
+        }
+    db.rollback()
+    return CatalogSnapshot(version, json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode())
+
+def get_snapshot(db: Session) -> CatalogSnapshot:
+    snapshot = snapshot_cache.get("snapshot")
+    if snapshot is None:
+        with _build_lock:
+            snapshot = snapshot_cache.get("snapshot")
+            if snapshot is None:
+                snapshot = build_snapshot(db)
+                snapshot_cache.set("snapshot", snapshot)
+    return snapshot
+
+@router.get("/snapshot")
+def get_catalog_snapshot(request: Request, db: Session = Depends(get_db)):
+    """Products, categories and tax rates in one compressed, versioned document"""
+    snapshot = get_snapshot(db)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if etag_matches(request, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    if prefers_brotli(request.headers):
+        headers["Content-Encoding"] = "br"
+        return Response(content=snapshot.br_body, media_type="application/json", headers=headers)
+    if "gzip" in accepted_encodings(request.headers):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+def _change_lines(since: int):
+    """Yield NDJSON upserts and deletes after `since`, then a checkpoint with the seq to resume from"""
+    db = SessionLocal()
+    try:
+        repeatable_read(db)
+        last_seq = since
+        for entity, model, fields in CATALOG_TABLES:
+            columns = [model.change_seq] + [getattr(model, field) for field in fields]
+            rows = db.query(*columns).filter(model.change_seq > since).order_by(model.change_seq, model.id)
+            for seq, *values in rows.yield_per(1000):
+                last_seq = max(last_seq, seq)
+                line = {"seq": seq, "entity": entity, "op": "upsert", "data": dict(zip(fields, _values(values)))}
+                yield json.dumps(line, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+        tombstones = db.query(CatalogTombstoneModel).filter(
+            CatalogTombstoneModel.change_seq > since
+        ).order_by(CatalogTombstoneModel.change_seq, CatalogTombstoneModel.id)
+        for tombstone in tombstones.yield_per(1000):
+            last_seq = max(last_seq, tombstone.change_seq)
+            line = {"seq": tombstone.change_seq, "entity": tombstone.entity, "op": "delete", "id": tombstone.entity_id}
+            yield json.dumps(line, separators=(",", ":")) + "\n"
+
+        yield json.dumps({"op": "checkpoint", "seq": last_seq}, separators=(",", ":")) + "\n"
+    finally:
+        db.close()
+
+@router.get("/changes")
+def get_catalog_changes(since: int = Query(0, ge=0)):
+    """Stream catalog changes with change_seq greater than `since` as NDJSON"""
+    return StreamingResponse(_change_lines(since), media_type="application/x-ndjson")
@@ -1,30 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
+from catalog_cache import invalidate_catalog
+from category_tree import get_category_tree, is_in_subtree
 from database import get_db
+from http_cache import conditional_get
+from loaders import category_loader_options
 from models import Category as CategoryModel
-from schemas import Category, CategoryCreate
+from schemas import Category, CategoryCreate, CategoryTreeNode
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Category])
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(CategoryModel).all()
+def get_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(request, response, db, "categories")
+    if not_modified:
+        return not_modified
+    categories = db.query(CategoryModel).options(*category_loader_options()).all()
     return categories
 
+@router.get("/tree", response_model=List[CategoryTreeNode])
+def get_categories_tree(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(request, response, db, "categories")
+    if not_modified:
+        return not_modified
+    return Response(content=get_category_tree(db), media_type="application/json", headers=dict(response.headers))
+
 @router.get("/{category_id}", response_model=Category)
 def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+    category = db.query(CategoryModel).options(*category_loader_options()).filter(CategoryModel.id == category_id).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
 @router.post("/", response_model=Category)
 def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+    if category.parent_id and not db.query(CategoryModel.id).filter(CategoryModel.id == category.parent_id).first():
+        raise HTTPException(status_code=400, detail="Parent category not found")
+    
     db_category = CategoryModel(**category.dict())
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    # Cached products embed their category's children
+    invalidate_catalog()
     return db_category
 
 @router.put("/{category_id}", response_model=Category)
@@ -33,11 +52,19 @@ def update_category(category_id: int, category: CategoryCreate, db: Session = De
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    if category.parent_id:
+        parent = db.query(CategoryModel).filter(CategoryModel.id == category.parent_id).first()
+        if not parent:
+            raise HTTPException(status_code=400, detail="Parent category not found")
+        if is_in_subtree(parent, db_category):
+            raise HTTPException(status_code=400, detail="A category cannot be moved under itself or its sub-categories")
+    
     for field, value in category.dict().items():
         setattr(db_category, field, value)
     
     db.commit()
     db.refresh(db_category)
+    invalidate_catalog()
     return db_category
 
 @router.delete("/{category_id}")
@@ -48,4 +75,5 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_category)
     db.commit()
+    invalidate_catalog()
     return {"message": "Category deleted successfully"} 
\ No newline at end of file
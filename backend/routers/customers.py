@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
+from fast_json import FAST_JSON_RESPONSES, json_response
 from models import Customer as CustomerModel
 from schemas import Customer, CustomerCreate
 
@@ -10,6 +11,8 @@ router = APIRouter()
 @router.get("/", response_model=List[Customer])
 def get_customers(db: Session = Depends(get_db)):
     customers = db.query(CustomerModel).all()
+    if FAST_JSON_RESPONSES:
+        return json_response(List[Customer], customers)
     return customers
 
 @router.get("/{customer_id}", response_model=Customer)
@@ -1,20 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
+from http_cache import conditional_get
+from loaders import device_loader_options
 from models import Device as DeviceModel, Branch as BranchModel
 from schemas import Device, DeviceCreate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Device])
-def get_devices(db: Session = Depends(get_db)):
-    devices = db.query(DeviceModel).all()
+def get_devices(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(request, response, db, "devices", "branches")
+    if not_modified:
+        return not_modified
+    devices = db.query(DeviceModel).options(*device_loader_options()).all()
     return devices
 
 @router.get("/{device_id}", response_model=Device)
 def get_device(device_id: int, db: Session = Depends(get_db)):
-    device = db.query(DeviceModel).filter(DeviceModel.id == device_id).first()
+    device = db.query(DeviceModel).options(*device_loader_options()).filter(DeviceModel.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     return device
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from typing import Literal
+from database import engine, async_engine, replica_engine, async_replica_engine
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def get_db_pool_metrics(engine_type: Literal["sync", "async", "replica", "async_replica"] = "sync"):
+    """Connection pool configuration, saturation, checkout waits and connection churn"""
+    pool = {
+        "sync": engine,
+        "async": async_engine,
+        "replica": replica_engine,
+        "async_replica": async_replica_engine
+    }[engine_type].pool
+    return pool.metrics.snapshot(pool)
@@ -1,49 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
+import csv
+import io
 from decimal import Decimal
-from database import get_db
+from database import get_db, get_async_db
+from fast_json import FAST_JSON_RESPONSES, json_response
+from http_cache import conditional_get
+from catalog_changes import lock_catalog_writes, next_change_seq
+from category_tree import category_subtree_ids
+from catalog_cache import product_cache, cache_product, invalidate_product, invalidate_catalog
+from loaders import product_loader_options
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from product_autocomplete import product_autocomplete
+from product_import import import_products
+from product_search import search_products
+from table_versions import bump_table_versions
 from models import Product as ProductModel, Category as CategoryModel, TaxRate as TaxRateModel
-from schemas import Product, ProductCreate, ProductUpdate
+from schemas import (
+    Product, ProductCreate, ProductUpdate, ProductSuggestion, ProductImportReport,
+    BulkPriceUpdate, BulkPriceUpdateResult
+)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Product])
 def get_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     tax_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(ProductModel)
-    
-    if search:
-        query = query.filter(ProductModel.name.ilike(f"%{search}%"))
+    not_modified = conditional_get(request, response, db, "products", "categories", "tax_rates")
+    if not_modified:
+        return not_modified
+    query = db.query(ProductModel).options(*product_loader_options())
     
+    # Includes products in sub-categories
     if category_id:
-        query = query.filter(ProductModel.category_id == category_id)
+        query = query.filter(ProductModel.category_id.in_(category_subtree_ids(category_id)))
     
     if tax_id:
         query = query.filter(ProductModel.tax_id == tax_id)
     
-    products = query.offset(skip).limit(limit).all()
+    # Search results are ranked by relevance, so they page with skip only
+    if search:
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported with search")
+        products = search_products(query, search, skip, limit)
+        return json_response(List[Product], products, response) if FAST_JSON_RESPONSES else products
+    
+    # Keyset pagination: continue after the id of the last row
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(ProductModel.id > last_id)
+    
+    products = query.order_by(ProductModel.id).offset(skip).limit(limit).all()
+    
+    if len(products) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(products[-1].id)
+    if FAST_JSON_RESPONSES:
+        return json_response(List[Product], products, response)
     return products
 
+@router.get("/autocomplete", response_model=List[ProductSuggestion])
+def autocomplete_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    # Answered from memory; the database is only read to build or refresh the index
+    product_autocomplete.ensure_fresh(db)
+    return product_autocomplete.lookup(q, limit)
+
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    body = product_cache.get(("id", product_id))
+    if body is None:
+        product = (await db.execute(
+            select(ProductModel).options(*product_loader_options()).where(ProductModel.id == product_id)
+        )).scalar()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = cache_product(product)
+    return Response(content=body, media_type="application/json")
 
 @router.get("/code/{product_code}", response_model=Product)
-def get_product_by_code(product_code: str, db: Session = Depends(get_db)):
-    product = db.query(ProductModel).filter(ProductModel.code == product_code).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+async def get_product_by_code(product_code: str, db: AsyncSession = Depends(get_async_db)):
+    # Barcode scans are answered from the catalog cache when possible
+    body = product_cache.get(("code", product_code))
+    if body is None:
+        product = (await db.execute(
+            select(ProductModel).options(*product_loader_options()).where(ProductModel.code == product_code)
+        )).scalar()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = cache_product(product)
+    return Response(content=body, media_type="application/json")
 
 @router.post("/", response_model=Product)
 def create_product(product: ProductCreate, db: Session = Depends(get_db)):
@@ -68,8 +131,82 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    invalidate_product(db_product.id, db_product.code)
+    product_autocomplete.upsert(db_product.id, db_product.code, db_product.name, db_product.price)
     return db_product
 
+@router.post("/import", response_model=ProductImportReport)
+def import_products_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: Session = Depends(get_db)
+):
+    """Upsert products by code from a CSV or NDJSON upload; invalid rows are reported, not imported"""
+    if format is None:
+        format = "ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = import_products(db, stream, format)
+        db.commit()
+    except (ValueError, csv.Error) as e:  # ValueError includes UnicodeDecodeError
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Import conflicts with existing data")
+    
+    invalidate_catalog()
+    product_autocomplete.mark_stale()
+    return report
+
+@router.post("/bulk-price", response_model=BulkPriceUpdateResult)
+def bulk_update_prices(change: BulkPriceUpdate, db: Session = Depends(get_db)):
+    """Set or scale the price of every matching product in one UPDATE and one change event"""
+    if (change.price is None) == (change.percent is None):
+        raise HTTPException(status_code=400, detail="Give exactly one of price or percent")
+    if change.product_ids is None and change.category_id is None and change.tax_id is None:
+        raise HTTPException(status_code=400, detail="Give product_ids, category_id or tax_id")
+    
+    criteria = []
+    if change.product_ids is not None:
+        criteria.append(ProductModel.id.in_(change.product_ids))
+    if change.category_id is not None:
+        if not db.query(CategoryModel.id).filter(CategoryModel.id == change.category_id).first():
+            raise HTTPException(status_code=400, detail="Category not found")
+        criteria.append(ProductModel.category_id.in_(category_subtree_ids(change.category_id)))
+    if change.tax_id is not None:
+        if not db.query(TaxRateModel.id).filter(TaxRateModel.id == change.tax_id).first():
+            raise HTTPException(status_code=400, detail="Tax rate not found")
+        criteria.append(ProductModel.tax_id == change.tax_id)
+    
+    if change.price is not None:
+        new_price = change.price
+    else:
+        new_price = func.round(ProductModel.price * (1 + change.percent / 100), 2)
+    
+    # A change_seq is drawn, and caches dropped, only if some price changes
+    lock_catalog_writes(db)
+    criteria.append(ProductModel.price != new_price)
+    if not db.query(exists().where(*criteria)).scalar():
+        db.rollback()
+        return {"updated": 0, "change_seq": None}
+    
+    change_seq = next_change_seq(db)
+    stmt = update(ProductModel).where(*criteria).values(
+        price=new_price, change_seq=change_seq, updated_at=func.now()
+    ).returning(ProductModel.id).execution_options(synchronize_session=False)
+    try:
+        updated = len(db.execute(stmt).all())
+        bump_table_versions(db, "products")
+        db.commit()
+    except DataError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="New price out of range")
+    
+    invalidate_catalog()
+    product_autocomplete.mark_stale()
+    return {"updated": updated, "change_seq": change_seq}
+
 @router.put("/{product_id}", response_model=Product)
 def update_product(product_id: int, product: ProductUpdate, db: Session = Depends(get_db)):
     db_product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
@@ -97,12 +234,15 @@ def update_product(product_id: int, product: ProductUpdate, db: Session = Depend
         if not tax_rate:
             raise HTTPException(status_code=400, detail="Tax rate not found")
     
+    previous_code = db_product.code
     update_data = product.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_product, field, value)
     
     db.commit()
     db.refresh(db_product)
+    invalidate_product(product_id, previous_code, db_product.code)
+    product_autocomplete.upsert(db_product.id, db_product.code, db_product.name, db_product.price)
     return db_product
 
 @router.delete("/{product_id}")
@@ -111,6 +251,9 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    product_code = db_product.code
     db.delete(db_product)
     db.commit()
+    invalidate_product(product_id, product_code)
+    product_autocomplete.remove(product_id)
     return {"message": "Product deleted successfully"} 
\ No newline at end of file
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from datetime import datetime, date
 from decimal import Decimal
-from database import get_db
+import sales_archive
+import sales_export
+from database import get_db, get_async_db, get_read_db, get_async_read_db, mark_read_primary, read_sessionmaker
+from fast_json import FAST_JSON_RESPONSES, json_response
+from loaders import sale_loader_options
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from rollups import add_sales_to_rollup
 from models import (
     Sale as SaleModel, 
     SaleItem as SaleItemModel, 
@@ -13,6 +23,8 @@ from models import (
     Customer as CustomerModel,
     Payment as PaymentModel,
     InvoiceSyncLog as InvoiceSyncLogModel,
+    SalesDailyRollup as SalesDailyRollupModel,
+    SaleUsin as SaleUsinModel,
     FBRStatusEnum,
     InvoiceTypeEnum
 )
@@ -20,73 +32,160 @@ from schemas import Sale, SaleCreate, SaleSummary, FBRInvoicePayload, FBRRespons
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Sale])
-def get_sales(
+def _date_range(column, start_date: Optional[date], end_date: Optional[date]) -> list:
+    criteria = []
+    if start_date:
+        criteria.append(column >= start_date)
+    if end_date:
+        criteria.append(column <= end_date)
+    return criteria
+
+def _sale_filters(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    branch_id: Optional[int],
+    device_id: Optional[int],
+    fbr_status: Optional[FBRStatusEnum]
+) -> list:
+    """WHERE criteria shared by the sales list and export"""
+    criteria = _date_range(SaleModel.invoice_date, start_date, end_date)
+    if branch_id:
+        criteria.append(SaleModel.branch_id == branch_id)
+    if device_id:
+        criteria.append(SaleModel.device_id == device_id)
+    if fbr_status:
+        criteria.append(SaleModel.fbr_status == fbr_status)
+    return criteria
+
+@router.get("/", response_model=Union[List[Sale], List[SaleSummary]])
+async def get_sales(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     branch_id: Optional[int] = None,
     device_id: Optional[int] = None,
     fbr_status: Optional[FBRStatusEnum] = None,
-    db: Session = Depends(get_db)
+    view: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    query = db.query(SaleModel)
-    
-    if start_date:
-        query = query.filter(SaleModel.invoice_date >= start_date)
+    """List sales newest first; view=summary returns SaleSummary rows instead of full sales"""
+    if view == "summary":
+        item_count = select(func.count(SaleItemModel.id)).where(
+            SaleItemModel.sale_id == SaleModel.id, SaleItemModel.sale_date == SaleModel.invoice_date
+        ).correlate(SaleModel).scalar_subquery()
+        stmt = select(
+            SaleModel.id,
+            SaleModel.invoice_no,
+            SaleModel.total_amount,
+            SaleModel.fbr_status,
+            SaleModel.created_at,
+            item_count.label("item_count")
+        )
+    else:
+        stmt = select(SaleModel).options(*sale_loader_options())
+    stmt = stmt.where(*_sale_filters(start_date, end_date, branch_id, device_id, fbr_status))
     
-    if end_date:
-        query = query.filter(SaleModel.invoice_date <= end_date)
+    # Keyset pagination: continue after the (created_at, id) of the last row
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        created_at, last_id = decode_cursor(cursor, datetime, int)
+        stmt = stmt.where(tuple_(SaleModel.created_at, SaleModel.id) < (created_at, last_id))
     
-    if branch_id:
-        query = query.filter(SaleModel.branch_id == branch_id)
+    result = await db.execute(stmt.order_by(
+        SaleModel.created_at.desc(), SaleModel.id.desc()
+    ).offset(skip).limit(limit))
+    sales = result.all() if view == "summary" else result.scalars().all()
     
-    if device_id:
-        query = query.filter(SaleModel.device_id == device_id)
-    
-    if fbr_status:
-        query = query.filter(SaleModel.fbr_status == fbr_status)
-    
-    sales = query.order_by(SaleModel.created_at.desc()).offset(skip).limit(limit).all()
+    if len(sales) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sales[-1].created_at, sales[-1].id)
+    # Summaries are always rendered directly, with no per-row validation
+    if view == "summary":
+        return json_response(List[SaleSummary], sales, response)
+    if FAST_JSON_RESPONSES:
+        return json_response(List[Sale], sales, response)
     return sales
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/export")
+def export_sales(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    branch_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    fbr_status: Optional[FBRStatusEnum] = None
+):
+    """Stream every matching sale with its items.
+
+    NDJSON has one sale per line with nested items; CSV has one row per item.
+    Rows come from a server-side cursor, so memory stays flat for any size.
+    """
+    criteria = _sale_filters(start_date, end_date, branch_id, device_id, fbr_status)
+    # The same months of items, so only their partitions are joined
+    item_criteria = _date_range(SaleItemModel.sale_date, start_date, end_date)
+    return StreamingResponse(
+        sales_export.export_sales(criteria, format, read_sessionmaker(request), item_criteria),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sales.{format}"'}
+    )
+
 @router.get("/{sale_id}", response_model=Sale)
 def get_sale(sale_id: int, db: Session = Depends(get_db)):
-    sale = db.query(SaleModel).filter(SaleModel.id == sale_id).first()
+    sale = db.query(SaleModel).options(*sale_loader_options()).filter(SaleModel.id == sale_id).first()
+    if not sale:
+        sale = sales_archive.load_archived_sale(db, sale_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     return sale
 
-@router.post("/", response_model=Sale)
-def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
-    # Validate branch exists
-    branch = db.query(BranchModel).filter(BranchModel.id == sale.branch_id).first()
-    if not branch:
+async def _validate_sale_references(sale: SaleCreate, db: AsyncSession):
+    """Validate every id and unique key referenced by a sale with set-based queries"""
+    checks = (await db.execute(select(
+        exists().where(BranchModel.id == sale.branch_id).label("branch"),
+        exists().where(DeviceModel.id == sale.device_id).label("device"),
+        exists().where(CustomerModel.id == sale.customer_id).label("customer"),
+        exists().where(SaleModel.invoice_no == sale.invoice_no).label("invoice_no"),
+        exists().where(SaleUsinModel.usin == sale.usin).label("usin")
+    ))).one()
+    
+    if not checks.branch:
         raise HTTPException(status_code=400, detail="Branch not found")
     
-    # Validate device exists
-    device = db.query(DeviceModel).filter(DeviceModel.id == sale.device_id).first()
-    if not device:
+    if not checks.device:
         raise HTTPException(status_code=400, detail="Device not found")
     
-    # Validate customer exists if provided
-    if sale.customer_id:
-        customer = db.query(CustomerModel).filter(CustomerModel.id == sale.customer_id).first()
-        if not customer:
-            raise HTTPException(status_code=400, detail="Customer not found")
+    if sale.customer_id and not checks.customer:
+        raise HTTPException(status_code=400, detail="Customer not found")
     
-    # Check if invoice number already exists
-    existing_invoice = db.query(SaleModel).filter(SaleModel.invoice_no == sale.invoice_no).first()
-    if existing_invoice:
+    if checks.invoice_no:
         raise HTTPException(status_code=400, detail="Invoice number already exists")
     
-    # Check if USIN already exists
-    existing_usin = db.query(SaleModel).filter(SaleModel.usin == sale.usin).first()
-    if existing_usin:
+    if checks.usin:
         raise HTTPException(status_code=400, detail="USIN already exists")
     
-    # Create the sale
+    # Validate all products with a single set-based lookup
+    product_ids = {item.product_id for item in sale.items}
+    if product_ids:
+        found_ids = set((await db.execute(
+            select(ProductModel.id).where(ProductModel.id.in_(product_ids))
+        )).scalars())
+        for item in sale.items:
+            if item.product_id not in found_ids:
+                raise HTTPException(status_code=400, detail=f"Product {item.product_id} not found")
+
+@router.post("/", response_model=Sale)
+async def create_sale(sale: SaleCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    await _validate_sale_references(sale, db)
+    
+    # Build the sale with its items and payments so the header, items and
+    # payments are flushed together (batched INSERT ... RETURNING) and
+    # committed with the daily rollup update in a single transaction
     db_sale = SaleModel(
         invoice_no=sale.invoice_no,
         branch_id=sale.branch_id,
@@ -103,118 +202,141 @@ def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
         total_tax=sale.total_tax,
         total_discount=sale.total_discount,
         total_amount=sale.total_amount,
-        usin=sale.usin
+        usin=sale.usin,
+        items=[
+            SaleItemModel(
+                product_id=item.product_id,
+                hs_code=item.hs_code,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                value_excl_tax=item.value_excl_tax,
+                sales_tax=item.sales_tax,
+                further_tax=item.further_tax,
+                c_v_t=item.c_v_t,
+                w_h_tax_1=item.w_h_tax_1,
+                w_h_tax_2=item.w_h_tax_2,
+                discount=item.discount,
+                sro_item_serial_no=item.sro_item_serial_no,
+                line_total=item.line_total
+            )
+            for item in sale.items
+        ],
+        payments=[
+            PaymentModel(
+                method=payment.method,
+                amount=payment.amount,
+                details=payment.details
+            )
+            for payment in sale.payments
+        ]
     )
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-    
-    # Create sale items
-    for item in sale.items:
-        # Validate product exists
-        product = db.query(ProductModel).filter(ProductModel.id == item.product_id).first()
-        if not product:
-            raise HTTPException(status_code=400, detail=f"Product {item.product_id} not found")
-        
-        # Create sale item
-        db_item = SaleItemModel(
-            sale_id=db_sale.id,
-            product_id=item.product_id,
-            hs_code=item.hs_code,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            value_excl_tax=item.value_excl_tax,
-            sales_tax=item.sales_tax,
-            further_tax=item.further_tax,
-            c_v_t=item.c_v_t,
-            w_h_tax_1=item.w_h_tax_1,
-            w_h_tax_2=item.w_h_tax_2,
-            discount=item.discount,
-            sro_item_serial_no=item.sro_item_serial_no,
-            line_total=item.line_total
-        )
-        db.add(db_item)
-    
-    # Create payments
-    for payment in sale.payments:
-        db_payment = PaymentModel(
-            sale_id=db_sale.id,
-            method=payment.method,
-            amount=payment.amount,
-            details=payment.details
+    
+    try:
+        db.add(db_sale)
+        await db.flush()
+        await db.run_sync(
+            add_sales_to_rollup, SaleModel.id == db_sale.id, SaleModel.invoice_date == db_sale.invoice_date
         )
-        db.add(db_payment)
+        await db.commit()
+    except IntegrityError:
+        # A concurrent checkout took the same invoice number/USIN, or a
+        # referenced row was deleted after validation
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Sale conflicts with existing data")
+    except Exception:
+        await db.rollback()
+        raise
+    # Reads that follow on this client, like the sales list, must see the sale
+    mark_read_primary(response)
     
-    db.commit()
-    db.refresh(db_sale)
-    return db_sale
+    return (await db.execute(
+        select(SaleModel).options(*sale_loader_options()).execution_options(populate_existing=True).where(
+            SaleModel.id == db_sale.id, SaleModel.invoice_date == db_sale.invoice_date
+        )
+    )).scalar_one()
 
 @router.post("/{sale_id}/sync-fbr")
 def sync_sale_to_fbr(sale_id: int, db: Session = Depends(get_db)):
-    """Sync sale to FBR system"""
+    """Queue a sale for the FBR sync worker (see fbr_worker.py)"""
     sale = db.query(SaleModel).filter(SaleModel.id == sale_id).first()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
-    # Create sync log entry
-    sync_log = InvoiceSyncLogModel(
-        sale_id=sale_id,
-        attempt_no=sale.sync_attempts + 1,
-        status=FBRStatusEnum.PENDING
-    )
-    db.add(sync_log)
-    
-    # Update sale sync attempts
-    sale.sync_attempts += 1
-    sale.fbr_status = FBRStatusEnum.SENT
-    sale.last_synced_at = datetime.utcnow()
+    if sale.fbr_status == FBRStatusEnum.SUCCESS:
+        raise HTTPException(status_code=400, detail="Sale already synced to FBR")
     
+    # A manual retry skips the remaining backoff delay, and requeues invoices
+    # the worker gave up on (FAILED with no next_attempt_at)
+    if sale.fbr_status == FBRStatusEnum.FAILED:
+        sale.fbr_status = FBRStatusEnum.PENDING
+    sale.next_attempt_at = None
     db.commit()
     
-    # TODO: Implement actual FBR API call here
-    # This would involve making HTTP requests to FBR's API
-    
     return {
         "message": "Sale queued for FBR sync",
         "sale_id": sale_id,
+        "fbr_status": sale.fbr_status,
         "sync_attempts": sale.sync_attempts
     }
 
-@router.get("/stats/daily")
-def get_daily_stats(db: Session = Depends(get_db)):
-    today = date.today()
-    sales = db.query(SaleModel).filter(
-        SaleModel.invoice_date >= today
-    ).all()
+STATS_GROUP_COLUMNS = {
+    "day": SalesDailyRollupModel.day,
+    "branch": SalesDailyRollupModel.branch_id,
+    "device": SalesDailyRollupModel.device_id
+}
+
+def _sales_stats(db: Session, start: date, end: Optional[date], group_by: Optional[str]):
+    """Sum sale count, revenue and tax for [start, end] from the daily rollup"""
+    columns = [
+        func.coalesce(func.sum(SalesDailyRollupModel.sale_count), 0).label("total_sales"),
+        func.coalesce(func.sum(SalesDailyRollupModel.total_amount), 0).label("total_revenue"),
+        func.coalesce(func.sum(SalesDailyRollupModel.total_tax), 0).label("total_tax")
+    ]
+    if group_by:
+        group_column = STATS_GROUP_COLUMNS[group_by]
+        query = db.query(group_column.label("group_id"), *columns).group_by(
+            group_column
+        ).order_by(group_column)
+    else:
+        query = db.query(*columns)
     
-    total_sales = len(sales)
-    total_revenue = sum(sale.total_amount for sale in sales)
-    total_tax = sum(sale.total_tax for sale in sales)
+    query = query.filter(SalesDailyRollupModel.day >= start)
+    if end:
+        query = query.filter(SalesDailyRollupModel.day <= end)
+    rows = query.all()
     
-    return {
-        "date": today,
-        "total_sales": total_sales,
-        "total_revenue": total_revenue,
-        "total_tax": total_tax
+    stats = {
+        "total_sales": sum(row.total_sales for row in rows),
+        "total_revenue": sum((row.total_revenue for row in rows), Decimal(0)),
+        "total_tax": sum((row.total_tax for row in rows), Decimal(0))
     }
+    if group_by:
+        stats["groups"] = [
+            {
+                "day" if group_by == "day" else f"{group_by}_id": row.group_id,
+                "total_sales": row.total_sales,
+                "total_revenue": row.total_revenue,
+                "total_tax": row.total_tax
+            }
+            for row in rows
+        ]
+    return stats
+
+@router.get("/stats/daily")
+def get_daily_stats(
+    group_by: Optional[Literal["branch", "device"]] = None,
+    db: Session = Depends(get_read_db)
+):
+    today = date.today()
+    return {"date": today, **_sales_stats(db, today, today, group_by)}
 
 @router.get("/stats/monthly")
-def get_monthly_stats(db: Session = Depends(get_db)):
-    current_month = datetime.now().replace(day=1)
-    sales = db.query(SaleModel).filter(
-        SaleModel.invoice_date >= current_month
-    ).all()
-    
-    total_sales = len(sales)
-    total_revenue = sum(sale.total_amount for sale in sales)
-    total_tax = sum(sale.total_tax for sale in sales)
-    
-    return {
-        "month": current_month.strftime("%Y-%m"),
-        "total_sales": total_sales,
-        "total_revenue": total_revenue,
-        "total_tax": total_tax
-    }
+def get_monthly_stats(
+    group_by: Optional[Literal["day", "branch", "device"]] = None,
+    db: Session = Depends(get_read_db)
+):
+    current_month = date.today().replace(day=1)
+    return {"month": current_month.strftime("%Y-%m"), **_sales_stats(db, current_month, None, group_by)}
 
 @router.get("/fbr-status/{sale_id}")
 def get_fbr_status(sale_id: int, db: Session = Depends(get_db)):
@@ -232,6 +354,7 @@ def get_fbr_status(sale_id: int, db: Session = Depends(get_db)):
         "fbr_status": sale.fbr_status,
         "sync_attempts": sale.sync_attempts,
         "last_synced_at": sale.last_synced_at,
+        "next_attempt_at": sale.next_attempt_at,
         "fbr_invoice_no": sale.fbr_invoice_no,
         "sync_logs": [
             {
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
+from catalog_cache import invalidate_catalog, invalidate_snapshot
 from database import get_db
+from http_cache import conditional_get
 from models import TaxRate as TaxRateModel
 from schemas import TaxRate, TaxRateCreate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[TaxRate])
-def get_tax_rates(db: Session = Depends(get_db)):
+def get_tax_rates(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(request, response, db, "tax_rates")
+    if not_modified:
+        return not_modified
     tax_rates = db.query(TaxRateModel).all()
     return tax_rates
 
@@ -32,6 +37,7 @@ def create_tax_rate(tax_rate: TaxRateCreate, db: Session = Depends(get_db)):
     db.add(db_tax_rate)
     db.commit()
     db.refresh(db_tax_rate)
+    invalidate_snapshot()
     return db_tax_rate
 
 @router.put("/{tax_rate_id}", response_model=TaxRate)
@@ -53,6 +59,7 @@ def update_tax_rate(tax_rate_id: int, tax_rate: TaxRateCreate, db: Session = Dep
     
     db.commit()
     db.refresh(db_tax_rate)
+    invalidate_catalog()
     return db_tax_rate
 
 @router.delete("/{tax_rate_id}")
@@ -63,4 +70,5 @@ def delete_tax_rate(tax_rate_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_tax_rate)
     db.commit()
+    invalidate_catalog()
     return {"message": "Tax rate deleted successfully"} 
\ No newline at end of file
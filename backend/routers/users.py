@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List
 from passlib.context import CryptContext
 from database import get_db
+from fast_json import FAST_JSON_RESPONSES, json_response
+from loaders import user_loader_options
 from models import User as UserModel
 from schemas import User, UserCreate
 
@@ -17,12 +19,14 @@ def verify_password(plain_password: str, hashed_password: str):
 
 @router.get("/", response_model=List[User])
 def get_users(db: Session = Depends(get_db)):
-    users = db.query(UserModel).all()
+    users = db.query(UserModel).options(*user_loader_options()).all()
+    if FAST_JSON_RESPONSES:
+        return json_response(List[User], users)
     return users
 
 @router.get("/{user_id}", response_model=User)
 def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = db.query(UserModel).options(*user_loader_options()).filter(UserModel.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -0,0 +1,231 @@
+import enum
+import json
+import os
+import shutil
+from datetime import date
+from typing import Iterator, List, Optional
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Integer, MetaData, Numeric, Table, func, select, text
+from sqlalchemy.orm import Session
+from database import engine
+from fast_json import render_json
+from loaders import sale_loader_options
+from models import (
+    Sale as SaleModel,
+    SaleItem as SaleItemModel,
+    Payment as PaymentModel,
+    SalesArchiveMonth as SalesArchiveMonthModel,
+    FBRStatusEnum
+)
+from partitions import add_months, detach_month, list_partitions, month_start, partition_name
+from schemas import Sale
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only archiving and reads of archived sales need it
+    pa = pq = None
+
+SALES_ARCHIVE_DIR = os.getenv("SALES_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+# Months this recent stay in the hot tables even when fully synced
+SALES_ARCHIVE_KEEP_MONTHS = int(os.getenv("SALES_ARCHIVE_KEEP_MONTHS", "3"))
+ARCHIVE_BATCH_ROWS = 50000
+ARCHIVE_BATCH_SALES = 1000
+
+# Archived table -> the column its file is sorted by, so row-group statistics
+# let a lookup of one sale skip the rest of the file
+ARCHIVED_TABLES = {
+    SaleModel.__table__: "id",
+    SaleItemModel.__table__: "sale_id",
+    PaymentModel.__table__: "sale_id",
+}
+# Each sale as GET /api/sales/{id} returns it, with the branch, device,
+# customer and products as they were when the month was archived
+SALE_RESPONSES_FILE = "sale_responses.parquet"
+SALE_RESPONSES_SCHEMA = None if pa is None else pa.schema([
+    pa.field("id", pa.int32(), False),
+    pa.field("response", pa.string(), False),
+])
+
+def _require_pyarrow():
+    if pq is None:
+        raise RuntimeError("pyarrow is required for the sales archive: pip install pyarrow")
+
+def _arrow_type(column):
+    if isinstance(column.type, BigInteger):
+        return pa.int64()
+    if isinstance(column.type, Integer):
+        return pa.int32()
+    if isinstance(column.type, Numeric):
+        return pa.decimal128(column.type.precision, column.type.scale)
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    # Strings, enums (by value) and JSON (as text)
+    return pa.string()
+
+def _arrow_schema(table: Table):
+    return pa.schema([pa.field(column.name, _arrow_type(column), column.nullable) for column in table.columns])
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return value
+
+def month_path(month: date) -> str:
+    return os.path.join(SALES_ARCHIVE_DIR, f"{month:%Y-%m}")
+
+def _file(directory: str, table: Table) -> str:
+    return os.path.join(directory, f"{table.name}.parquet")
+
+def _partition(table: Table, month: date) -> Table:
+    """One month's partition of table, with the parent's columns and types"""
+    return table.to_metadata(MetaData(), name=partition_name(table.name, month))
+
+def _partition_rows(conn, table: Table, month: date, order_by: str) -> Iterator[list]:
+    """Rows of one month's partition in batches, from a server-side cursor"""
+    partition = _partition(table, month)
+    result = conn.execution_options(yield_per=ARCHIVE_BATCH_ROWS).execute(
+        select(*partition.columns).order_by(partition.c[order_by], partition.c.id)
+    )
+    for rows in result.partitions():
+        yield [{key: _plain(value) for key, value in row._mapping.items()} for row in rows]
+
+def _sale_responses(conn, month: date) -> Iterator[list]:
+    """The month's sales serialized as schemas.Sale JSON, in batches by id"""
+    sales = _partition(SaleModel.__table__, month)
+    last_id = 0
+    with Session(bind=conn) as db:
+        while True:
+            ids = conn.execute(
+                select(sales.c.id).where(sales.c.id > last_id).order_by(sales.c.id).limit(ARCHIVE_BATCH_SALES)
+            ).scalars().all()
+            if not ids:
+                return
+            loaded = {
+                sale.id: sale
+                for sale in db.query(SaleModel).options(*sale_loader_options()).filter(SaleModel.id.in_(ids))
+            }
+            yield [dict(id=sale_id, response=render_json(Sale, loaded[sale_id]).decode()) for sale_id in ids]
+            db.expunge_all()
+            last_id = ids[-1]
+
+def sale_counts(conn, month: date):
+    """The month's sale count and how many of those FBR has not confirmed"""
+    sales = _partition(SaleModel.__table__, month)
+    return conn.execute(select(
+        func.count(),
+        func.count().filter(sales.c.fbr_status != FBRStatusEnum.SUCCESS)
+    ).select_from(sales)).one()
+
+def closed_months(conn, keep_months: int = SALES_ARCHIVE_KEEP_MONTHS) -> List[date]:
+    """Attached sales months older than keep_months with sales, all of them FBR SUCCESS"""
+    cutoff = add_months(month_start(date.today()), -keep_months)
+    months = sorted(
+        date(int(name[-7:-3]), int(name[-2:]), 1) for name in list_partitions(conn, "sales")
+    )
+    closed = []
+    for month in months:
+        if month < cutoff:
+            total, unsynced = sale_counts(conn, month)
+            if total and not unsynced:
+                closed.append(month)
+    return closed
+
+def write_month(conn, month: date) -> dict:
+    """Write the month's sales, items, payments and sale responses to zstd Parquet files.
+
+    Files go to a temporary directory that replaces the month's directory when
+    complete, so a crash never leaves a half-written archive in place. Run it
+    in a REPEATABLE READ transaction so every file sees the same sales.
+    """
+    _require_pyarrow()
+    directory = month_path(month)
+    staging = directory + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    counts = {}
+    for table, order_by in ARCHIVED_TABLES.items():
+        schema = _arrow_schema(table)
+        count = 0
+        with pq.ParquetWriter(_file(staging, table), schema, compression="zstd") as writer:
+            for rows in _partition_rows(conn, table, month, order_by):
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+        counts[table.name] = count
+    count = 0
+    with pq.ParquetWriter(os.path.join(staging, SALE_RESPONSES_FILE), SALE_RESPONSES_SCHEMA, compression="zstd") as writer:
+        for rows in _sale_responses(conn, month):
+            writer.write_table(pa.Table.from_pylist(rows, schema=SALE_RESPONSES_SCHEMA))
+            count += len(rows)
+    if count != counts["sales"]:
+        raise RuntimeError(f"{month:%Y-%m} has {counts['sales']} sales but {count} sale responses")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+    return counts
+
+def archive_month(month: date) -> Optional[SalesArchiveMonthModel]:
+    """Move a closed month of sales, items and payments to Parquet files.
+
+    The month's partitions are detached, counted against the files and dropped
+    in one transaction; the sales_archive_months row commits with the drop.
+    Returns None if the month has no sales.
+    """
+    month = month_start(month)
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+        if partition_name("sales", month) not in list_partitions(conn, "sales"):
+            raise ValueError(f"{month:%Y-%m} has no attached sales partition")
+        total, unsynced = sale_counts(conn, month)
+        if not total:
+            return None
+        if unsynced:
+            raise ValueError(f"{month:%Y-%m} still has {unsynced} sales not synced to FBR")
+        counts = write_month(conn, month)
+        conn.rollback()
+
+    with engine.begin() as conn:
+        detach_month(conn, month, list(table.name for table in ARCHIVED_TABLES))
+        # Detached, so no sale can arrive or change between the count and the drop
+        for table in ARCHIVED_TABLES:
+            name = partition_name(table.name, month)
+            if conn.execute(text(f'SELECT count(*) FROM "{name}"')).scalar() != counts[table.name]:
+                raise RuntimeError(f"{name} changed while it was archived; run the archive again")
+        sale_ids = conn.execute(text(
+            f'SELECT min(id), max(id) FROM "{partition_name("sales", month)}"'
+        )).one()
+        archived = dict(
+            month=month,
+            min_sale_id=sale_ids[0],
+            max_sale_id=sale_ids[1],
+            sale_count=counts["sales"],
+            item_count=counts["sale_items"],
+            payment_count=counts["payments"],
+            path=month_path(month)
+        )
+        archive_months = SalesArchiveMonthModel.__table__
+        conn.execute(archive_months.delete().where(archive_months.c.month == month))
+        conn.execute(archive_months.insert().values(archived))
+        for table in ARCHIVED_TABLES:
+            conn.execute(text(f'DROP TABLE "{partition_name(table.name, month)}"'))
+    return SalesArchiveMonthModel(**archived)
+
+def load_archived_sale(db: Session, sale_id: int) -> Optional[Sale]:
+    """An archived sale as it was serialized when archived, or None if no archive holds it"""
+    paths = db.scalars(select(SalesArchiveMonthModel.path).where(
+        SalesArchiveMonthModel.min_sale_id <= sale_id,
+        SalesArchiveMonthModel.max_sale_id >= sale_id
+    )).all()
+    if not paths:
+        return None
+    _require_pyarrow()
+    for path in paths:
+        rows = pq.read_table(
+            os.path.join(path, SALE_RESPONSES_FILE), columns=["response"], filters=[("id", "=", sale_id)]
+        ).column("response").to_pylist()
+        if rows:
+            return Sale.model_validate_json(rows[0])
+    return None
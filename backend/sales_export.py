@@ -0,0 +1,102 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator, List
+from sqlalchemy import and_, select
+from sqlalchemy.orm import sessionmaker
+from database import SessionLocal
+from models import Sale as SaleModel, SaleItem as SaleItemModel
+
+SALE_EXPORT_COLUMNS = [
+    "id", "invoice_no", "invoice_date", "invoice_type", "sale_type_code", "branch_id", "device_id",
+    "customer_id", "seller_ntn", "seller_strn", "buyer_ntn", "buyer_name", "total_qty",
+    "total_sales_value", "total_tax", "total_discount", "total_amount", "usin", "fbr_invoice_no",
+    "fbr_status", "created_at"
+]
+ITEM_EXPORT_COLUMNS = [
+    "id", "product_id", "hs_code", "quantity", "unit_price", "value_excl_tax", "sales_tax",
+    "further_tax", "c_v_t", "w_h_tax_1", "w_h_tax_2", "discount", "sro_item_serial_no", "line_total"
+]
+EXPORT_YIELD_PER = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def _plain(value):
+    """Decimals as strings and timestamps in ISO format, as in the JSON API"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def export_query(criteria: list, item_criteria: list = ()):
+    """SELECT (sale columns..., item columns...) of the matching sales, ordered by sale"""
+    return select(
+        *[SaleModel.__table__.c[column] for column in SALE_EXPORT_COLUMNS],
+        *[SaleItemModel.__table__.c[column] for column in ITEM_EXPORT_COLUMNS]
+    ).outerjoin(SaleItemModel, and_(
+        SaleItemModel.sale_id == SaleModel.id, SaleItemModel.sale_date == SaleModel.invoice_date, *item_criteria
+    )).where(*criteria).order_by(SaleModel.id, SaleItemModel.id)
+
+def _export_rows(criteria: list, session_factory: sessionmaker, item_criteria: list) -> Iterator[tuple]:
+    """Stream export rows from a server-side cursor in their own session"""
+    stmt = export_query(criteria, item_criteria).execution_options(yield_per=EXPORT_YIELD_PER)
+
+    db = session_factory()
+    try:
+        for row in db.execute(stmt):
+            yield tuple(_plain(value) for value in row)
+    finally:
+        db.close()
+
+def _chunked(pieces: Iterator[str]) -> Iterator[bytes]:
+    """Join small pieces into ~64 KiB writes"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+def _ndjson_lines(rows: Iterator[tuple]) -> Iterator[str]:
+    """One JSON object per sale with its items nested"""
+    sale_width = len(SALE_EXPORT_COLUMNS)
+    sale, items = None, []
+    for row in rows:
+        if sale is None or row[0] != sale["id"]:
+            if sale is not None:
+                yield json.dumps({**sale, "items": items}, separators=(",", ":"), ensure_ascii=False) + "\n"
+            sale, items = dict(zip(SALE_EXPORT_COLUMNS, row[:sale_width])), []
+        if row[sale_width] is not None:
+            items.append(dict(zip(ITEM_EXPORT_COLUMNS, row[sale_width:])))
+    if sale is not None:
+        yield json.dumps({**sale, "items": items}, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+def _csv_lines(rows: Iterator[tuple]) -> Iterator[str]:
+    """One row per sale item with the sale columns repeated; sales without items get one row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SALE_EXPORT_COLUMNS + [f"item_{column}" for column in ITEM_EXPORT_COLUMNS])
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def export_sales(criteria: List, fmt: str, session_factory: sessionmaker = SessionLocal,
+                 item_criteria: List = ()) -> Iterator[bytes]:
+    """Byte chunks of the sales matching criteria in NDJSON or CSV.
+
+    item_criteria narrow the joined items, e.g. to the partitions of a date range.
+    """
+    rows = _export_rows(criteria, session_factory, item_criteria)
+    lines = _ndjson_lines(rows) if fmt == "ndjson" else _csv_lines(rows)
+    return _chunked(lines)
@@ -76,6 +76,11 @@ class Category(CategoryBase):
     class Config:
         from_attributes = True
 
+class CategoryTreeNode(BaseModel):
+    id: int
+    name: str
+    children: List["CategoryTreeNode"] = []
+
 # Tax Rate schemas
 class TaxRateBase(BaseModel):
     name: str = Field(..., max_length=100)
@@ -120,6 +125,38 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductSuggestion(BaseModel):
+    id: int
+    code: str
+    name: str
+    price: Decimal
+
+class ProductImportError(BaseModel):
+    line: int
+    code: Optional[str] = None
+    error: str
+
+class ProductImportReport(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    unchanged: int
+    failed: int
+    errors: List[ProductImportError] = []
+
+class BulkPriceUpdate(BaseModel):
+    # Selectors; products must match all that are given
+    product_ids: Optional[List[int]] = None
+    category_id: Optional[int] = None  # includes sub-categories
+    tax_id: Optional[int] = None
+    # Exactly one of: a new absolute price, or a percentage change (10 = +10%)
+    price: Optional[Decimal] = Field(None, ge=0)
+    percent: Optional[Decimal] = Field(None, gt=-100, le=1000)
+
+class BulkPriceUpdateResult(BaseModel):
+    updated: int
+    change_seq: Optional[int] = None  # None when no price changed
+
 # User schemas
 class UserBase(BaseModel):
     username: str = Field(..., max_length=50)
@@ -307,4 +344,5 @@ class FBRResponse(BaseModel):
     error_details: Optional[Dict[str, Any]] 
 
 Category.update_forward_refs()
-CategorySimple.update_forward_refs() 
\ No newline at end of file
+CategorySimple.update_forward_refs()
+CategoryTreeNode.update_forward_refs() 
\ No newline at end of file
@@ -0,0 +1,39 @@
+from itertools import chain
+from typing import Dict, Iterable
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from models import TableVersion as TableVersionModel
+
+# Tables whose list endpoints answer conditional GETs (see http_cache.py)
+VERSIONED_TABLES = {"products", "categories", "tax_rates", "branches", "devices"}
+
+def bump_table_versions(db: Session, *tables: str):
+    """Record a write to tables in the caller's transaction.
+
+    Writers that bypass the ORM (bulk updates, COPY) must call this themselves.
+    """
+    # A fixed order keeps two writers from locking the counters crosswise
+    stmt = pg_insert(TableVersionModel).values([{"table_name": table, "version": 1} for table in sorted(tables)])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["table_name"],
+        set_={"version": TableVersionModel.version + 1}
+    ))
+
+def get_table_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """Current version of each table; 0 for tables never written through the API"""
+    tables = list(tables)
+    versions = dict(db.query(TableVersionModel.table_name, TableVersionModel.version).filter(
+        TableVersionModel.table_name.in_(tables)
+    ))
+    return {table: versions.get(table, 0) for table in tables}
+
+@event.listens_for(Session, "before_flush")
+def bump_flushed_table_versions(session, flush_context, instances):
+    tables = {
+        obj.__tablename__ for obj in chain(session.new, session.dirty, session.deleted)
+        if getattr(obj, "__tablename__", None) in VERSIONED_TABLES
+        and (obj not in session.dirty or session.is_modified(obj, include_collections=False))
+    }
+    if tables:
+        bump_table_versions(session, *tables)
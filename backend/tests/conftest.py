@@ -0,0 +1,79 @@
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# These tests run against the Postgres database in DATABASE_URL (the
+# partitioned tables, JSONB and the sync worker need Postgres); without one
+# they are skipped.
+
+@pytest.fixture(scope="session")
+def db_engine():
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from sqlalchemy import text
+    from database import engine
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"database not available: {e}")
+    return engine
+
+@pytest.fixture(scope="session")
+def client(db_engine):
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def catalog(client):
+    """A new branch, device, tax rate, category and product, with a unique tag"""
+    tag = uuid.uuid4().hex[:8]
+    branch = client.post("/api/branches/", json=dict(
+        name=f"Branch {tag}", ntn="1234567", strn="1234567", fbr_branch_code=f"BR{tag}", sale_type_code="T1000017"
+    )).json()
+    device = client.post("/api/devices/", json=dict(
+        branch_id=branch["id"], name=f"Device {tag}", device_identifier=f"DV{tag}", fbr_pos_reg=f"P{tag}"
+    )).json()
+    tax_rate = client.post("/api/tax-rates/", json=dict(name=f"GST {tag}", rate="17.00")).json()
+    category = client.post("/api/categories/", json=dict(name=f"Category {tag}")).json()
+    product = client.post("/api/products/", json=dict(
+        code=f"PC{tag}", name=f"Product {tag}", price="10.00", category_id=category["id"], tax_id=tax_rate["id"]
+    )).json()
+    return dict(tag=tag, branch=branch, device=device, tax_rate=tax_rate, category=category, product=product)
+
+def sale_body(catalog, suffix="", product_ids=None):
+    product_ids = product_ids or [catalog["product"]["id"]]
+    tag = catalog["tag"] + suffix
+    return dict(
+        invoice_no=f"INV{tag}", usin=f"USIN{tag}", branch_id=catalog["branch"]["id"], device_id=catalog["device"]["id"],
+        invoice_type="SALE", sale_type_code="T1000017", seller_ntn="1234567", seller_strn="1234567",
+        total_qty=str(len(product_ids)), total_sales_value="10", total_tax="1.7", total_amount="11.7",
+        items=[dict(product_id=product_id, quantity="1", unit_price="10", value_excl_tax="10",
+                    sales_tax="1.7", line_total="11.7") for product_id in product_ids],
+        payments=[dict(method="Cash", amount="11.7")]
+    )
+
+@pytest.fixture
+def count_statements(db_engine):
+    """Context manager counting the SQL statements sent by the sync and async engines"""
+    from sqlalchemy import event
+    from database import async_engine, async_replica_engine, replica_engine
+
+    @contextmanager
+    def counter():
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        engines = {db_engine, replica_engine, async_engine.sync_engine, async_replica_engine.sync_engine}
+        for target in engines:
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", record)
+    return counter
@@ -0,0 +1,17 @@
+from catalog_changes import current_change_seq
+from database import SessionLocal
+
+def latest_change_seq():
+    with SessionLocal() as db:
+        return current_change_seq(db)
+
+def test_unchanged_prices_emit_no_change_event(client, catalog):
+    change = dict(product_ids=[catalog["product"]["id"]], price="10.00")
+    before = latest_change_seq()
+    assert client.post("/api/products/bulk-price", json=change).json() == {"updated": 0, "change_seq": None}
+    assert latest_change_seq() == before
+
+    result = client.post("/api/products/bulk-price", json=dict(change, price="12.00")).json()
+    assert result["updated"] == 1
+    assert result["change_seq"] > before
+    assert latest_change_seq() == result["change_seq"]
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+import fbr_sync
+from fbr_sync import SyncResult, _claimable, record_results
+from models import Sale as SaleModel, FBRStatusEnum
+from schemas import FBRResponse
+
+def failed_result(sale, attempt_no, http_status):
+    result = SyncResult(sale.id, sale.invoice_date, attempt_no, {"invoice_number": sale.usin})
+    result.response = {"http_status": http_status, "body": {"message": "rejected"}}
+    result.fbr_response = FBRResponse(
+        status=FBRStatusEnum.FAILED.value, message="rejected", invoice_number=None, qr_code=None, error_details=None
+    )
+    return result
+
+@pytest.fixture
+def sale(client, catalog):
+    from conftest import sale_body
+    from database import SessionLocal
+    sale_id = client.post("/api/sales/", json=sale_body(catalog)).json()["id"]
+    with SessionLocal() as db:
+        yield db, db.query(SaleModel).filter(SaleModel.id == sale_id).one()
+
+def claimable(db, sale, later=timedelta(0)):
+    db.expire_all()
+    now = datetime.now(timezone.utc) + later
+    return db.scalar(select(SaleModel.id).where(SaleModel.id == sale.id, _claimable(now))) is not None
+
+@pytest.mark.parametrize("http_status, attempt_no, retried", [
+    (503, 1, True),
+    (None, 1, True),
+    (429, 1, True),
+    (400, 1, False),
+    (200, 1, False),
+    (503, 24, False),
+])
+def test_only_transient_failures_are_retried(sale, monkeypatch, http_status, attempt_no, retried):
+    monkeypatch.setattr(fbr_sync, "FBR_MAX_ATTEMPTS", 24)
+    db, row = sale
+    record_results(db, [failed_result(row, attempt_no, http_status)])
+    db.refresh(row)
+    assert row.fbr_status == FBRStatusEnum.FAILED
+    assert (row.next_attempt_at is not None) == retried
+    assert claimable(db, row, later=timedelta(seconds=fbr_sync.FBR_BACKOFF_MAX + 1)) == retried
+
+def test_manual_retry_requeues_a_rejected_sale(client, sale):
+    db, row = sale
+    record_results(db, [failed_result(row, 1, 400)])
+    assert not claimable(db, row, later=timedelta(days=365))
+
+    assert client.post(f"/api/sales/{row.id}/sync-fbr").status_code == 200
+    assert claimable(db, row)
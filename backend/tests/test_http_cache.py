@@ -0,0 +1,31 @@
+import json
+import pytest
+
+pytest.importorskip("brotli")
+
+def test_list_etag_is_weak_and_revalidates(client, catalog):
+    response = client.get("/api/products/", params={"limit": 50})
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert client.get("/api/products/", params={"limit": 50}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/products/", params={"limit": 50}, headers={"If-None-Match": etag[2:]}).status_code == 304
+
+@pytest.mark.parametrize("accept, coding", [("gzip, br", "br"), ("gzip, br;q=0", "gzip"), ("identity", None)])
+def test_compression_follows_accept_encoding(client, catalog, accept, coding):
+    response = client.get("/api/products/", params={"limit": 50}, headers={"Accept-Encoding": accept})
+    assert response.headers.get("content-encoding") == coding
+    if coding:
+        assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) > 1
+
+def test_streamed_export_is_brotli_compressed(client, catalog):
+    from conftest import sale_body
+    for n in range(3):
+        client.post("/api/sales/", json=sale_body(catalog, str(n)))
+    response = client.get(
+        "/api/sales/export", params={"branch_id": catalog["branch"]["id"]}, headers={"Accept-Encoding": "br"}
+    )
+    assert response.headers["content-encoding"] == "br"
+    assert [json.loads(line)["invoice_no"] for line in response.text.splitlines()] == [
+        f"INV{catalog['tag']}{n}" for n in range(3)
+    ]
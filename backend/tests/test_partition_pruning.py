@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+from models import Sale as SaleModel, SaleItem as SaleItemModel
+from partitions import add_months, month_start, partition_name
+from routers.sales import _date_range, _sale_filters
+from sales_export import export_query
+
+# EXPLAIN the sales queries that filter by date or sale key and assert that
+# Postgres scans only the partitions of the month involved, both for literal
+# queries (psycopg2) and for generic prepared plans (asyncpg)
+
+MONTH = month_start(date.today())
+START, END = MONTH, add_months(MONTH, 1) - timedelta(days=1)
+SALE_KEY = (1, datetime(MONTH.year, MONTH.month, 15, tzinfo=timezone.utc))
+SALES = {partition_name("sales", MONTH)}
+ITEMS = {partition_name("sale_items", MONTH)}
+
+def scanned_relations(plan):
+    """Names of the tables and partitions a JSON plan reads"""
+    relations = set()
+    if "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= scanned_relations(child)
+    return relations
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    return conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar()[0]["Plan"]
+
+def explain_generic(conn, stmt):
+    """EXPLAIN the plan a prepared statement reuses, with parameters pruned at executor startup"""
+    compiled = stmt.compile(dialect=asyncpg_dialect.dialect(), compile_kwargs={"render_postcompile": True})
+    values = [compiled.params[name] for name in compiled.positiontup]
+    conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+    conn.exec_driver_sql("PREPARE pruning_check AS " + compiled.string)
+    try:
+        placeholders = ", ".join(["%s"] * len(values))
+        return conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) EXECUTE pruning_check({placeholders})", tuple(values)
+        ).scalar()[0]["Plan"]
+    finally:
+        conn.exec_driver_sql("DEALLOCATE pruning_check")
+
+def sales_listing():
+    return select(SaleModel).where(*_sale_filters(START, END, None, None, None)).order_by(
+        SaleModel.created_at.desc(), SaleModel.id.desc()
+    ).limit(100)
+
+def sales_export():
+    return export_query(_sale_filters(START, END, None, None, None), _date_range(SaleItemModel.sale_date, START, END))
+
+def sale_items_of_a_sale():
+    return select(SaleItemModel).where(tuple_(SaleItemModel.sale_id, SaleItemModel.sale_date).in_([SALE_KEY]))
+
+def sale_by_key():
+    # The FBR worker's bulk UPDATE by (id, invoice_date)
+    return select(SaleModel.id).where(
+        SaleModel.id == SALE_KEY[0], SaleModel.invoice_date == SALE_KEY[1]
+    ).with_for_update()
+
+@pytest.fixture
+def conn(db_engine):
+    from partitions import ensure_partitions
+    with db_engine.begin() as connection:
+        ensure_partitions(connection)
+        yield connection
+        connection.rollback()
+
+@pytest.mark.parametrize("query, allowed", [
+    (sales_listing, SALES),
+    (sales_export, SALES | ITEMS),
+    (sale_items_of_a_sale, ITEMS),
+    (sale_by_key, SALES),
+])
+def test_literal_query_scans_one_month(conn, query, allowed):
+    scanned = scanned_relations(explain(conn, query()))
+    assert scanned and scanned <= allowed, scanned
+
+@pytest.mark.parametrize("query, allowed", [
+    (sales_listing, SALES),
+    (sale_items_of_a_sale, ITEMS),
+])
+def test_prepared_query_scans_one_month(conn, query, allowed):
+    scanned = scanned_relations(explain_generic(conn, query()))
+    assert scanned and scanned <= allowed, scanned
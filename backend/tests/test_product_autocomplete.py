@@ -0,0 +1,19 @@
+from decimal import Decimal
+from product_autocomplete import ProductAutocomplete
+
+def test_code_with_spaces_is_removed():
+    index = ProductAutocomplete()
+    index.upsert(1, "AB 12", "Milkpak 1L", Decimal("10.00"))
+    index.upsert(2, "CD", "Milk Bread", Decimal("5.00"))
+    index.remove(1)
+    assert all(product_id == 2 for _, product_id in index.entries)
+    assert [product["id"] for product in index.lookup("ab")] == []
+    assert [product["id"] for product in index.lookup("milk")] == [2]
+
+def test_renamed_code_with_spaces_replaces_old_tokens():
+    index = ProductAutocomplete()
+    index.upsert(1, "AB 12", "Milkpak", Decimal("10.00"))
+    index.upsert(1, "XY 34", "Milkpak", Decimal("10.00"))
+    assert sorted(index.entries) == [("milkpak", 1), ("xy 34", 1)]
+    assert index.lookup("ab") == []
+    assert [product["code"] for product in index.lookup("xy")] == ["XY 34"]
@@ -0,0 +1,60 @@
+import json
+
+def upload(client, content, filename):
+    return client.post("/api/products/import", files={"file": (filename, content.encode())})
+
+def product_by_code(client, code):
+    return client.get("/api/products/", params={"search": code}).json()[0]
+
+def ndjson(*records):
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records) + "\n"
+
+def test_ndjson_reports_bad_lines_individually(client, catalog):
+    tag, category_id = catalog["tag"], catalog["category"]["id"]
+    response = upload(client, ndjson(
+        "{not json",
+        {"code": f"IA{tag}", "name": "Imported A", "price": "12.50", "category_id": category_id},
+        {"name": "No code", "price": "1"},
+        {"code": f"IB{tag}", "name": "Imported B"},
+        {"code": f"IC{tag}", "name": "Imported C", "price": "3", "hs_code": "0401.1000"},
+    ), "prices.ndjson")
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["failed"]) == (5, 2, 3)
+    assert [(error["line"], error["error"]) for error in report["errors"]] == [
+        (1, "Not a JSON object"),
+        (3, "Missing required field(s): code"),
+        (4, "Missing required field(s): price"),
+    ]
+    assert product_by_code(client, f"IA{tag}")["category_id"] == category_id
+    assert product_by_code(client, f"IC{tag}")["hs_code"] == "0401.1000"
+
+def test_ndjson_keeps_optional_fields_missing_from_a_record(client, catalog):
+    product = catalog["product"]
+    response = upload(client, ndjson(
+        {"code": product["code"], "name": "Renamed", "price": "11.00"},
+        {"code": f"ID{catalog['tag']}", "name": "New", "price": "1", "tax_id": catalog["tax_rate"]["id"]},
+    ), "prices.jsonl")
+    assert response.json()["updated"] == 1
+    updated = client.get(f"/api/products/{product['id']}").json()
+    assert (updated["name"], updated["category_id"], updated["tax_id"]) == (
+        "Renamed", product["category_id"], product["tax_id"]
+    )
+
+def test_csv_without_required_column_is_rejected(client, catalog):
+    response = upload(client, f"code,name\nIE{catalog['tag']},No price\n", "prices.csv")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing required column(s): price"
+
+def test_prices_with_trailing_zeros_are_accepted(client, catalog):
+    tag = catalog["tag"]
+    response = upload(client, f"code,name,price\nIF{tag},Three decimals,12.500\nIG{tag},Too precise,1.005\n", "prices.csv")
+    report = response.json()
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["error"] == "price must be a non-negative amount with at most 2 decimals"
+    assert product_by_code(client, f"IF{tag}")["price"] == "12.50"
+
+def test_malformed_csv_is_rejected(client, catalog):
+    response = upload(client, f"code,name,price\nIH{catalog['tag']},\"{'x' * 200000}\",1\n", "prices.csv")
+    assert response.status_code == 400
+    assert "field larger than field limit" in response.json()["detail"]
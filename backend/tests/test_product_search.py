@@ -0,0 +1,26 @@
+def create_product(client, catalog, code, name, hs_code=None):
+    response = client.post("/api/products/", json=dict(
+        code=code, name=name, price="10.00", hs_code=hs_code,
+        category_id=catalog["category"]["id"], tax_id=catalog["tax_rate"]["id"]
+    ))
+    assert response.status_code == 200
+    return response.json()
+
+def search(client, term, **params):
+    return [product["id"] for product in client.get("/api/products/", params=dict(search=term, **params)).json()]
+
+def test_prefix_search_ranks_exact_code_first(client, catalog):
+    tag = catalog["tag"]
+    named = create_product(client, catalog, f"X{tag}", f"Milkpak{tag} 1L")
+    coded = create_product(client, catalog, f"Milkpak{tag}", "Other")
+    assert search(client, f"milkpak{tag}") == [coded["id"], named["id"]]
+
+def test_substring_search_when_no_prefix_matches(client, catalog):
+    tag = catalog["tag"]
+    milk = create_product(client, catalog, f"CODE-{tag}-77", f"Milkpak{tag} 1L", hs_code=f"04{tag[:6]}99")
+    assert search(client, f"kpak{tag}") == [milk["id"]]
+    assert search(client, f"-{tag}-7") == [milk["id"]]
+    assert search(client, f"{tag[:6]}99") == [milk["id"]]
+    assert search(client, f"kpak{tag} 1l") == [milk["id"]]
+    assert search(client, f"kpak{tag}", skip=1) == []
+    assert search(client, f"kpak{tag}%") == []
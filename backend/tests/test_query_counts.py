@@ -0,0 +1,66 @@
+import uuid
+import pytest
+from conftest import sale_body
+from database import SessionLocal
+from models import User as UserModel
+
+# Loader options keep every list endpoint at a fixed number of statements,
+# however many rows (and nested rows) come back
+MAX_STATEMENTS_PER_REQUEST = 6
+
+def assert_fixed_statements(count_statements, client, small_url, large_url, expected_rows):
+    with count_statements() as small:
+        small_rows = client.get(small_url).json()
+    with count_statements() as large:
+        large_rows = client.get(large_url).json()
+    assert len(small_rows) < len(large_rows)
+    assert len(large_rows) >= expected_rows
+    assert len(small) == len(large) <= MAX_STATEMENTS_PER_REQUEST, (small, large)
+
+def test_sales_list(client, catalog, count_statements):
+    second = client.post("/api/products/", json=dict(
+        code=f"PD{catalog['tag']}", name=f"Second {catalog['tag']}", price="5.00",
+        category_id=catalog["category"]["id"], tax_id=catalog["tax_rate"]["id"]
+    )).json()
+    for n in range(6):
+        assert client.post("/api/sales/", json=sale_body(
+            catalog, str(n), [catalog["product"]["id"], second["id"]]
+        )).status_code == 200
+    branch_id = catalog["branch"]["id"]
+    assert_fixed_statements(
+        count_statements, client, f"/api/sales/?branch_id={branch_id}&limit=1",
+        f"/api/sales/?branch_id={branch_id}&limit=6", 6
+    )
+
+def test_products_list(client, catalog, count_statements):
+    for n in range(5):
+        client.post("/api/products/", json=dict(
+            code=f"PE{catalog['tag']}{n}", name=f"Product {catalog['tag']} {n}", price="5.00",
+            category_id=catalog["category"]["id"], tax_id=catalog["tax_rate"]["id"]
+        ))
+    category_id = catalog["category"]["id"]
+    assert_fixed_statements(
+        count_statements, client, f"/api/products/?category_id={category_id}&limit=1",
+        f"/api/products/?category_id={category_id}&limit=6", 6
+    )
+
+@pytest.mark.parametrize("path", ["/api/devices/", "/api/users/"])
+def test_unpaged_lists(client, catalog, count_statements, path):
+    with count_statements() as before:
+        rows_before = client.get(path).json()
+    for n in range(3):
+        tag = uuid.uuid4().hex[:8]
+        if path == "/api/devices/":
+            client.post(path, json=dict(
+                branch_id=catalog["branch"]["id"], name=f"Device {tag}", device_identifier=f"DV{tag}", fbr_pos_reg=f"P{tag}"
+            ))
+        else:
+            # Inserted directly, so the test does not depend on the bcrypt backend
+            with SessionLocal() as db:
+                db.add(UserModel(username=f"user{tag}", email=f"{tag}@example.com", hashed_password="x",
+                                 branch_id=catalog["branch"]["id"]))
+                db.commit()
+    with count_statements() as after:
+        rows_after = client.get(path).json()
+    assert len(rows_after) == len(rows_before) + 3
+    assert len(before) == len(after) <= MAX_STATEMENTS_PER_REQUEST, (before, after)
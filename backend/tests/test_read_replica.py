@@ -0,0 +1,86 @@
+import os
+import pytest
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from conftest import sale_body
+
+# The "replica" is a second, empty database with the same schema, so a read
+# that reaches it finds none of the rows written to the primary.
+
+@pytest.fixture(scope="module")
+def replica(client, monkeypatch_module):
+    from models import Base
+    from partitions import ensure_partitions
+
+    url = os.getenv("TEST_DATABASE_REPLICA_URL")
+    created = None
+    if not url:
+        primary = make_url(database.DATABASE_URL)
+        created = f"{primary.database}_replica_test"
+        try:
+            with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{created}"'))
+                conn.execute(text(f'CREATE DATABASE "{created}"'))
+        except Exception as e:
+            pytest.skip(f"cannot create a replica database (set TEST_DATABASE_REPLICA_URL): {e}")
+        url = primary.set(database=created).render_as_string(hide_password=False)
+
+    replica_engine = create_engine(url)
+    Base.metadata.create_all(bind=replica_engine)
+    with replica_engine.begin() as conn:
+        ensure_partitions(conn)
+    async_replica_engine = create_async_engine(database._asyncpg_url(url))
+    monkeypatch_module.setattr(database, "DATABASE_REPLICA_URL", url)
+    monkeypatch_module.setattr(database, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch_module.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(
+        async_replica_engine, autoflush=False, expire_on_commit=False
+    ))
+    yield
+    # asyncpg connections must be closed on the loop that opened them
+    client.portal.call(async_replica_engine.dispose)
+    replica_engine.dispose()
+    if created:
+        with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{created}" WITH (FORCE)'))
+
+@pytest.fixture(scope="module")
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield monkeypatch
+
+@pytest.fixture
+def sale(client, catalog, replica):
+    client.cookies.clear()
+    response = client.post("/api/sales/", json=sale_body(catalog))
+    assert response.status_code == 200
+    yield response
+    client.cookies.clear()
+
+def listed_ids(client, catalog, **kwargs):
+    response = client.get("/api/sales/", params={"branch_id": catalog["branch"]["id"]}, **kwargs)
+    return [row["id"] for row in response.json()]
+
+def stats_branches(client, **kwargs):
+    response = client.get("/api/sales/stats/monthly", params={"group_by": "branch"}, **kwargs)
+    return [group["branch_id"] for group in response.json()["groups"]]
+
+def test_reads_go_to_the_replica(client, catalog, sale):
+    client.cookies.clear()
+    assert listed_ids(client, catalog) == []
+    assert catalog["branch"]["id"] not in stats_branches(client)
+    export = client.get("/api/sales/export", params={"branch_id": catalog["branch"]["id"]})
+    assert export.text == ""
+
+def test_reads_after_a_sale_go_to_the_primary(client, catalog, sale):
+    assert sale.cookies.get(database.READ_PRIMARY_COOKIE) == "1"
+    assert f"Max-Age={database.READ_PRIMARY_SECONDS}" in sale.headers["set-cookie"]
+    assert listed_ids(client, catalog) == [sale.json()["id"]]
+    assert catalog["branch"]["id"] in stats_branches(client)
+
+def test_read_primary_header(client, catalog, sale):
+    client.cookies.clear()
+    headers = {database.READ_PRIMARY_HEADER: "1"}
+    assert listed_ids(client, catalog, headers=headers) == [sale.json()["id"]]
+    assert catalog["branch"]["id"] in stats_branches(client, headers=headers)
@@ -0,0 +1,91 @@
+from datetime import date
+import pytest
+from sqlalchemy import text
+from partitions import add_months, partition_name
+
+pytest.importorskip("pyarrow")
+
+# A month long before any real sale, so archiving it moves only the test's sales
+MONTH = date(2000, 1, 1)
+
+@pytest.fixture
+def archive_dir(db_engine, tmp_path, monkeypatch):
+    import sales_archive
+    monkeypatch.setattr(sales_archive, "SALES_ARCHIVE_DIR", str(tmp_path))
+    with db_engine.begin() as conn:
+        for table in sales_archive.ARCHIVED_TABLES:
+            name = partition_name(table.name, MONTH)
+            conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+            conn.execute(text(
+                f'CREATE TABLE "{name}" PARTITION OF "{table.name}" '
+                f"FOR VALUES FROM ('{MONTH.isoformat()}') TO ('{add_months(MONTH, 1).isoformat()}')"
+            ))
+    yield tmp_path
+    with db_engine.begin() as conn:
+        conn.execute(text("DELETE FROM sales_archive_months WHERE month = :month"), {"month": MONTH})
+        for table in sales_archive.ARCHIVED_TABLES:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{partition_name(table.name, MONTH)}"'))
+
+def move_to_archived_month(db_engine, sale_id):
+    """Copy a sale with its items and payments into MONTH as synced to FBR and delete the original"""
+    with db_engine.begin() as conn:
+        conn.execute(text("CREATE TEMP TABLE moved_sale ON COMMIT DROP AS SELECT * FROM sales WHERE id = :id"), {"id": sale_id})
+        new_id = conn.execute(text("""
+            UPDATE moved_sale SET id = nextval(pg_get_serial_sequence('sales', 'id')),
+                invoice_no = invoice_no || 'A', usin = usin || 'A', invoice_date = '2000-01-15 12:00+00',
+                fbr_status = 'SUCCESS', fbr_invoice_no = 'FBR' || id
+            RETURNING id
+        """)).scalar()
+        conn.execute(text("INSERT INTO sales SELECT * FROM moved_sale"))
+        for table in ("sale_items", "payments"):
+            columns = list(conn.execute(text(f"SELECT * FROM {table} LIMIT 0")).keys())
+            values = ", ".join(
+                {"id": f"nextval(pg_get_serial_sequence('{table}', 'id'))", "sale_id": ":new_id",
+                 "sale_date": "(SELECT invoice_date FROM moved_sale)"}.get(name, name)
+                for name in columns
+            )
+            conn.execute(text(
+                f"INSERT INTO {table} ({', '.join(columns)}) SELECT {values} FROM {table} WHERE sale_id = :id"
+            ), {"id": sale_id, "new_id": new_id})
+        conn.execute(text("DELETE FROM sales WHERE id = :id"), {"id": sale_id})
+    return new_id
+
+def test_archived_sale_survives_deleted_product(db_engine, client, catalog, archive_dir):
+    import sales_archive
+    from conftest import sale_body
+    created = client.post("/api/sales/", json=sale_body(catalog))
+    assert created.status_code == 200, created.text
+    sale_id = move_to_archived_month(db_engine, created.json()["id"])
+    before = client.get(f"/api/sales/{sale_id}").json()
+
+    archived = sales_archive.archive_month(MONTH)
+    assert archived.sale_count == 1
+    assert client.delete(f"/api/products/{catalog['product']['id']}").status_code == 200
+
+    response = client.get(f"/api/sales/{sale_id}")
+    assert response.status_code == 200, response.text
+    assert response.json() == before
+    assert response.json()["items"][0]["product"]["id"] == catalog["product"]["id"]
+
+def test_rollup_rebuild_keeps_archived_months(db_engine, client, catalog, archive_dir):
+    import sales_archive
+    from conftest import sale_body
+    from database import SessionLocal
+    from models import SalesDailyRollup
+    from rollups import rebuild_rollup
+    sale_id = move_to_archived_month(db_engine, client.post("/api/sales/", json=sale_body(catalog)).json()["id"])
+    with db_engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO sales_daily_rollup (day, branch_id, device_id, invoice_type, sale_count, total_qty,
+                total_sales_value, total_tax, total_discount, total_amount)
+            SELECT CAST(invoice_date AS date), branch_id, device_id, invoice_type, 1, 1, 10, 1.7, 0, 11.7
+            FROM sales WHERE id = :id
+        """), {"id": sale_id})
+    sales_archive.archive_month(MONTH)
+
+    with SessionLocal() as db:
+        rebuild_rollup(db, MONTH, add_months(MONTH, 1))
+        rebuild_rollup(db)
+        rows = db.query(SalesDailyRollup).filter(SalesDailyRollup.branch_id == catalog["branch"]["id"]).all()
+        assert [(row.day, row.sale_count) for row in rows] == [(date(2000, 1, 15), 1)]
+        db.rollback()
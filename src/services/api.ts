@@ -187,6 +187,8 @@ class ApiService {
         'Content-Type': 'application/json',
         ...options.headers,
       },
+      // Sends the read_primary cookie set after a sale so the next reads see it
+      credentials: 'include',
       ...options,
     };
 